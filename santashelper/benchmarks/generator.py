@@ -0,0 +1,77 @@
+"""Deterministic synthetic books for benchmarks.
+
+The same size and seed always give the same children, notes, tags and
+wishlists, so timings of different versions are comparable.
+"""
+import datetime as dt
+import random
+
+from santashelper.classes.AddressBook import AddressBook
+from santashelper.classes.Fields import *
+from santashelper.classes.Record import Record
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+FIRST_NAMES = (
+    "Olivia", "Liam", "Emma", "Noah", "Amelia", "Oliver", "Ava", "Elijah", "Sophia", "Lucas",
+    "Mia", "Levi", "Isla", "Mateo", "Ivy", "Leo", "Luna", "Ezra", "Nora", "Hugo",
+)
+STREETS = ("Snow", "Pine", "Holly", "Candy Cane", "Reindeer", "Frost", "Mistletoe", "Sleigh")
+DOMAINS = ("example.com", "mail.test", "north.pole")
+GIFTS = (
+    "Lego", "Bike", "Doll", "Puzzle", "Drum", "Kite", "Robot", "Book", "Skates", "Train",
+    "Paints", "Ball", "Scooter", "Teddy", "Telescope", "Guitar",
+)
+WORDS = (
+    "sleigh", "reindeer", "present", "wrap", "ribbon", "chimney", "cookies", "milk", "list",
+    "naughty", "nice", "workshop", "toys", "snow", "lights", "bell", "elves", "deliver",
+    "route", "north", "pole", "stocking", "candy", "star", "tree", "gift", "card", "carol",
+)
+TAGS = ("urgent", "toys", "route", "kitchen", "sleigh", "mail", "workshop", "later")
+
+FIRST_BIRTHDAY = dt.date(2010, 1, 1).toordinal()
+LAST_BIRTHDAY = dt.date(2024, 12, 31).toordinal()
+
+
+def child_name(i: int) -> str:
+    "Unique single word name, usable as a shell argument"
+    return f"{FIRST_NAMES[i % len(FIRST_NAMES)]}{i}"
+
+
+def child_phone(i: int) -> str:
+    "Unique phone of child i, 7919 is coprime with 10**10 so phones never repeat"
+    return f"{(i * 7919 + 1234567) % 10**10:010d}"
+
+
+def make_record(i: int, rng: random.Random) -> Record:
+    name = child_name(i)
+    rec = Record(name)
+    rec.phones = [Phone.restore(child_phone(i))]
+    if rng.random() < 0.8:
+        rec.email = Email.restore(f"{name.lower()}@{rng.choice(DOMAINS)}")
+    if rng.random() < 0.9:
+        ordinal = rng.randint(FIRST_BIRTHDAY, LAST_BIRTHDAY)
+        rec.birthday = Birthday.restore(dt.date.fromordinal(ordinal))
+    if rng.random() < 0.7:
+        rec.address = Address.restore(f"{rng.randint(1, 999)} {rng.choice(STREETS)} Street")
+    rec.wishlist = [WishlistItem.restore(gift) for gift in rng.sample(GIFTS, rng.randint(0, 4))]
+    return rec
+
+
+def make_note(rng: random.Random) -> Note:
+    note = Note(" ".join(rng.choices(WORDS, k=rng.randint(4, 20))))
+    note.tags = set(rng.sample(TAGS, rng.randint(0, 3)))
+    return note
+
+
+def generate_book(children: int, notes: int = None, seed: int = 0) -> AddressBook:
+    "Book with given number of children and notes (a tenth of children by default)"
+    rng = random.Random(seed)
+    book = AddressBook()
+    for i in range(children):
+        book.add_record(make_record(i, rng))
+    for _ in range(children // 10 if notes is None else notes):
+        book.notes.add(make_note(rng))
+    book.changed.clear()
+    book.notes.changed.clear()
+    return book
@@ -0,0 +1,90 @@
+"""Memory taken by records, compared with the layout used before __slots__.
+
+Run: python -m santashelper.benchmarks.memory [children]
+"""
+import datetime as dt
+import sys
+import tracemalloc
+
+from santashelper.classes.Fields import Birthday
+from santashelper.classes.Record import Record
+
+
+class DictField:
+    "Field layout before __slots__: instance __dict__ and datetime birthday"
+
+    def __init__(self, value):
+        self._Field__value = value
+
+
+class DictRecord:
+    def __init__(self, name):
+        self.name = DictField(name)
+        self.phones = []
+        self.birthday = None
+        self.address = None
+        self.email = None
+        self.wishlist = []
+
+
+def child_values(i: int):
+    birthday = dt.date(2012, 1, 1) + dt.timedelta(days=i % 3000)
+    return (
+        f"Child {i}",
+        f"{i:010d}",
+        f"child{i}@example.com",
+        f"{i} Snow Street",
+        birthday,
+        ["Lego", "Bike"],
+    )
+
+
+def build_dict_records(count: int) -> dict:
+    records = {}
+    for i in range(count):
+        name, phone, email, address, birthday, wishlist = child_values(i)
+        rec = DictRecord(name)
+        rec.phones.append(DictField(phone))
+        rec.email = DictField(email)
+        rec.address = DictField(address)
+        rec.birthday = DictField(dt.datetime.combine(birthday, dt.time()))
+        rec.wishlist = [DictField(item) for item in wishlist]
+        records[name] = rec
+    return records
+
+
+def build_records(count: int) -> dict:
+    records = {}
+    for i in range(count):
+        name, phone, email, address, birthday, wishlist = child_values(i)
+        rec = Record(name)
+        rec.add_phone(phone)
+        rec.add_email(email)
+        rec.add_address(address)
+        rec.birthday = Birthday.restore(birthday)
+        rec.add_wishlist_items(wishlist)
+        records[name] = rec
+    return records
+
+
+def measure(build, count: int) -> int:
+    "Bytes allocated and kept by build(count)"
+    tracemalloc.start()
+    result = build(count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main(count: int = 100_000):
+    legacy = measure(build_dict_records, count)
+    current = measure(build_records, count)
+    print(f"children:           {count}")
+    print(f"__dict__ records:   {legacy / count:8.0f} bytes per child")
+    print(f"__slots__ records:  {current / count:8.0f} bytes per child")
+    print(f"saved:              {100 * (legacy - current) / legacy:8.1f} %")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
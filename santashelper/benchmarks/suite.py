@@ -0,0 +1,605 @@
+"""Timed scenarios over a synthetic book.
+
+Every scenario prepares its state once and returns the operation to time.
+The operation runs in a loop of `number` calls sized to take about
+`target` seconds, the loop is repeated and the median time per call is
+reported together with the peak memory (tracemalloc) of a single call.
+
+Run: python -m santashelper.benchmarks.suite --size 100k --output results.json
+     python -m santashelper.benchmarks.suite --size 100k --baseline results.json
+"""
+import argparse
+import datetime as dt
+import json
+import platform
+import os
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from santashelper.benchmarks.generator import SIZES, child_name, child_phone, generate_book, make_record
+from santashelper.classes.BirthdayEngine import np
+from santashelper.classes.HelpWorker import HelpWorker
+from santashelper.classes.Indexes import NameIndex, typo_distance
+from santashelper.classes.Journal import Journal
+from santashelper.classes.Record import Record
+from santashelper.classes.Shards import ShardedStorage
+
+SCENARIOS = {}
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12))).capitalize()
+
+
+def scenario(name: str):
+    "Register function(bench) returning the operation to time"
+
+    def decorator(func):
+        SCENARIOS[name] = func
+        return func
+
+    return decorator
+
+
+class Bench:
+    "State shared by scenarios: the book, a worker, a scratch directory and sample keys"
+
+    def __init__(self, book, workdir: Path, seed: int = 0):
+        self.book = book
+        # scenarios repeat one query, time computing it rather than cache hits
+        book.cache.size = book.notes.cache.size = 0
+        self.worker = HelpWorker()
+        self.dir = Path(workdir)
+        self.journal = Journal(self.dir / "book.dmp", limit=1 << 62)
+        self.shards = ShardedStorage(self.dir / "book.shards")
+        self.rng = random.Random(seed + 1)
+        size = len(book.data)
+        self.size = size
+        self.index = self.rng.randrange(size)
+        self.name = child_name(self.index)
+        self.phone = child_phone(self.index)
+        self.email = next(rec.email.value for rec in book.data.values() if rec.email is not None)
+        self.note = str(self.rng.randrange(book.notes.max_index) + 1) if book.notes else None
+
+    def lacking(self, field: str) -> str:
+        "Name of a child without field, adding and deleting it leaves the book as it was"
+        return next(name for name, rec in self.book.data.items() if getattr(rec, field) is None)
+
+
+# ---- AddressBook ----
+@scenario("book.find")
+def book_find(bench: Bench):
+    return lambda: bench.book.find(bench.name)
+
+
+@scenario("book.find_by_phone")
+def book_find_by_phone(bench: Bench):
+    return lambda: bench.book.find_by_phone(bench.phone)
+
+
+@scenario("book.find_by_email")
+def book_find_by_email(bench: Bench):
+    return lambda: bench.book.find_by_email(bench.email)
+
+
+@scenario("book.search_name")
+def book_search_name(bench: Bench):
+    return lambda: bench.book.search(bench.name.lower())
+
+
+@scenario("book.search_street")
+def book_search_street(bench: Bench):
+    return lambda: bench.book.search("holly street")
+
+
+@scenario("book.complete_names")
+def book_complete_names(bench: Bench):
+    return lambda: bench.book.complete_names("oli", 100)
+
+
+@scenario("book.suggest_names")
+def book_suggest_names(bench: Bench):
+    typo = bench.name[1] + bench.name[0] + bench.name[2:]
+    return lambda: bench.book.suggest_names(typo)
+
+
+@scenario("book.closest")
+def book_closest(bench: Bench):
+    """A miss among as many names of random letters as there are children,
+    generated names share long prefixes and would end the walk early"""
+    rng = random.Random(0)
+    names = NameIndex()
+    names.add_many(Record(random_word(rng)) for _ in range(bench.size))
+    miss = random_word(rng)
+    return lambda: names.closest(miss, typo_distance(miss))
+
+
+@scenario("book.get_contact_names")
+def book_get_contact_names(bench: Bench):
+    return bench.book.get_contact_names
+
+
+@scenario("book.get_birthdays_per_days")
+def book_get_birthdays_per_days(bench: Bench):
+    return lambda: bench.book.get_birthdays_per_days(7)
+
+
+@scenario("book.get_birthday_records")
+def book_get_birthday_records(bench: Bench):
+    return lambda: bench.book.get_birthday_records(30)
+
+
+@scenario("book.get_birthdays_in_month")
+def book_get_birthdays_in_month(bench: Bench):
+    return lambda: bench.book.get_birthdays_in_month(12)
+
+
+@scenario("book.get_ages")
+def book_get_ages(bench: Bench):
+    return bench.book.get_ages
+
+
+@scenario("book.str")
+def book_str(bench: Bench):
+    return lambda: str(bench.book)
+
+
+@scenario("book.add_delete")
+def book_add_delete(bench: Bench):
+    def run():
+        rec = make_record(bench.size, random.Random(0))
+        bench.book.add_record(rec)
+        bench.book.delete(str(rec.name))
+
+    return run
+
+
+# ---- Notes ----
+@scenario("notes.add_delete")
+def notes_add_delete(bench: Bench):
+    def run():
+        index = bench.book.add_note("wrap the presents before the sleigh leaves")
+        bench.book.notes.delete(str(index))
+
+    return run
+
+
+@scenario("notes.show")
+def notes_show(bench: Bench):
+    return lambda: bench.book.notes.show(bench.note)
+
+
+@scenario("notes.list")
+def notes_list(bench: Bench):
+    return bench.book.notes.list
+
+
+@scenario("notes.search_words")
+def notes_search_words(bench: Bench):
+    return lambda: bench.book.notes.search("sleigh reindeer")
+
+
+@scenario("notes.search_prefix")
+def notes_search_prefix(bench: Bench):
+    return lambda: bench.book.notes.search("deliv* cook*")
+
+
+@scenario("notes.search_phrase")
+def notes_search_phrase(bench: Bench):
+    return lambda: bench.book.notes.search('"north pole"')
+
+
+@scenario("notes.change_note")
+def notes_change_note(bench: Bench):
+    text = bench.book.notes.data[int(bench.note)].value
+    return lambda: bench.book.notes.change_note(bench.note, text)
+
+
+@scenario("notes.add_del_tag")
+def notes_add_del_tag(bench: Bench):
+    def run():
+        bench.book.notes.add_tag(bench.note, "benchmark")
+        bench.book.notes.del_tag(bench.note, "benchmark")
+
+    return run
+
+
+@scenario("notes.get_taged_any")
+def notes_get_taged_any(bench: Bench):
+    return lambda: bench.book.notes.get_taged({"urgent", "mail"})
+
+
+@scenario("notes.get_taged_all_not")
+def notes_get_taged_all_not(bench: Bench):
+    return lambda: bench.book.notes.get_taged(set(), {"toys", "route"}, {"later"})
+
+
+@scenario("notes.tag_counts")
+def notes_tag_counts(bench: Bench):
+    return bench.book.notes.tag_counts
+
+
+# ---- HelpWorker ----
+@scenario("worker.add_delete_contact")
+def worker_add_delete_contact(bench: Bench):
+    name = child_name(bench.size)
+
+    def run():
+        bench.worker.add_contact([name, child_phone(bench.size)], bench.book)
+        bench.worker.delete_contact([name], bench.book)
+
+    return run
+
+
+@scenario("worker.change_phone")
+def worker_change_phone(bench: Bench):
+    new_phone = child_phone(bench.size)
+
+    def run():
+        bench.worker.change_phone([bench.name, bench.phone, new_phone], bench.book)
+        bench.worker.change_phone([bench.name, new_phone, bench.phone], bench.book)
+
+    return run
+
+
+@scenario("worker.add_del_phone")
+def worker_add_del_phone(bench: Bench):
+    phone = child_phone(bench.size)
+
+    def run():
+        bench.worker.add_phone([bench.name, phone], bench.book)
+        bench.worker.del_phone([bench.name, phone], bench.book)
+
+    return run
+
+
+@scenario("worker.add_del_email")
+def worker_add_del_email(bench: Bench):
+    name = bench.lacking("email")
+    args = [name, f"{name.lower()}@benchmark.com"]
+
+    def run():
+        bench.worker.add_email(args, bench.book)
+        bench.worker.del_email([name], bench.book)
+
+    return run
+
+
+@scenario("worker.add_del_birthday")
+def worker_add_del_birthday(bench: Bench):
+    name = bench.lacking("birthday")
+
+    def run():
+        bench.worker.add_birthday([name, "24.12.2015"], bench.book)
+        bench.worker.del_birthday([name], bench.book)
+
+    return run
+
+
+@scenario("worker.add_del_address")
+def worker_add_del_address(bench: Bench):
+    name = bench.lacking("address")
+
+    def run():
+        bench.worker.add_address([name, "1", "North", "Pole"], bench.book)
+        bench.worker.del_address([name], bench.book)
+
+    return run
+
+
+@scenario("worker.add_wishlist_items")
+def worker_add_wishlist_items(bench: Bench):
+    items = [item.value for item in bench.book.find(bench.name).wishlist]
+
+    def run():
+        bench.worker.add_wishlist_items([bench.name, "sled", "skates"], bench.book)
+        bench.worker.add_wishlist_items([bench.name, *items], bench.book)
+
+    return run
+
+
+@scenario("worker.show_contact")
+def worker_show_contact(bench: Bench):
+    return lambda: bench.worker.show_contact([bench.name], bench.book)
+
+
+@scenario("worker.list_children")
+def worker_list_children(bench: Bench):
+    args = [f"--offset={bench.size // 2}", "--limit=20"]
+    return lambda: bench.worker.list_children(args, bench.book)
+
+
+@scenario("worker.list_children_sorted")
+def worker_list_children_sorted(bench: Bench):
+    args = ["--sort=age", "--desc", f"--offset={bench.size // 2}", "--limit=20"]
+    return lambda: bench.worker.list_children(args, bench.book)
+
+
+@scenario("worker.show_birthday")
+def worker_show_birthday(bench: Bench):
+    return lambda: bench.worker.show_birthday([bench.name], bench.book)
+
+
+@scenario("worker.find_by_phone")
+def worker_find_by_phone(bench: Bench):
+    return lambda: bench.worker.find_by_phone([bench.phone], bench.book)
+
+
+@scenario("worker.find_by_email")
+def worker_find_by_email(bench: Bench):
+    return lambda: bench.worker.find_by_email([bench.email], bench.book)
+
+
+@scenario("worker.search")
+def worker_search(bench: Bench):
+    return lambda: bench.worker.search(["snow"], bench.book)
+
+
+@scenario("worker.get_birthdays_per_days")
+def worker_get_birthdays_per_days(bench: Bench):
+    return lambda: bench.worker.get_birthdays_per_days(["7"], bench.book)
+
+
+@scenario("worker.get_birthdays_in_month")
+def worker_get_birthdays_in_month(bench: Bench):
+    return lambda: bench.worker.get_birthdays_in_month(["12"], bench.book)
+
+
+@scenario("worker.add_del_note")
+def worker_add_del_note(bench: Bench):
+    def run():
+        bench.worker.add_note(["wrap", "the", "presents"], bench.book)
+        bench.worker.del_note([str(bench.book.notes.max_index)], bench.book)
+
+    return run
+
+
+@scenario("worker.add_del_tag")
+def worker_add_del_tag(bench: Bench):
+    def run():
+        bench.worker.add_tag([bench.note, "benchmark"], bench.book)
+        bench.worker.del_tag([bench.note, "benchmark"], bench.book)
+
+    return run
+
+
+@scenario("worker.show_note")
+def worker_show_note(bench: Bench):
+    return lambda: bench.worker.show_note([bench.note], bench.book)
+
+
+@scenario("worker.show_notes")
+def worker_show_notes(bench: Bench):
+    return lambda: bench.worker.show_notes([], bench.book)
+
+
+@scenario("worker.search_notes")
+def worker_search_notes(bench: Bench):
+    return lambda: bench.worker.search_notes(["cookies", "milk"], bench.book)
+
+
+@scenario("worker.get_taged_notes")
+def worker_get_taged_notes(bench: Bench):
+    return lambda: bench.worker.get_taged_notes(["urgent", "-later"], bench.book)
+
+
+@scenario("worker.show_tags")
+def worker_show_tags(bench: Bench):
+    return lambda: bench.worker.show_tags([], bench.book)
+
+
+@scenario("worker.show_wishlist")
+def worker_show_wishlist(bench: Bench):
+    return lambda: bench.worker.show_wishlist([bench.name], bench.book)
+
+
+@scenario("worker.export_csv")
+def worker_export_csv(bench: Bench):
+    path = str(bench.dir / "children.csv")
+    return lambda: bench.worker.export_contacts([path], bench.book)
+
+
+@scenario("worker.import_delete_1k")
+def worker_import_delete_1k(bench: Bench):
+    path = bench.dir / "new-children.jsonl"
+    rng = random.Random(0)
+    names = []
+    with open(path, "w", encoding="utf-8") as fh:
+        for i in range(bench.size, bench.size + 1000):
+            rec = make_record(i, rng)
+            names.append(str(rec.name))
+            row = {"name": str(rec.name), "phones": [child_phone(i)]}
+            if rec.birthday is not None:
+                row["birthday"] = dt.date(2020, 1, 1).strftime("%d.%m.%Y")
+            fh.write(json.dumps(row) + "\n")
+
+    def run():
+        bench.worker.import_contacts([str(path)], bench.book)
+        for name in names:
+            bench.book.delete(name)
+
+    return run
+
+
+# ---- storage ----
+@scenario("storage.save_one_change")
+def storage_save_one_change(bench: Bench):
+    def run():
+        bench.book.changed.add(bench.name)
+        bench.journal.save(bench.book)
+
+    return run
+
+
+@scenario("storage.compact")
+def storage_compact(bench: Bench):
+    return lambda: bench.journal.compact(bench.book)
+
+
+@scenario("storage.load")
+def storage_load(bench: Bench):
+    bench.journal.compact(bench.book)
+    return bench.journal.load
+
+
+@scenario("storage.shards_save_one_change")
+def storage_shards_save_one_change(bench: Bench):
+    bench.shards.compact(bench.book)
+
+    def run():
+        bench.book.changed.add(bench.name)
+        bench.shards.save(bench.book)
+
+    return run
+
+
+@scenario("storage.shards_load")
+def storage_shards_load(bench: Bench):
+    bench.shards.compact(bench.book)
+    return ShardedStorage(bench.shards.path).load
+
+
+# ---- startup ----
+@scenario("startup.time_to_prompt")
+def startup_time_to_prompt(bench: Bench):
+    "Start `elf` in a new interpreter on the saved book and exit at the first prompt"
+    home = bench.dir / "home"
+    home.mkdir(exist_ok=True)
+    Journal(home / "santas-book.dmp").compact(bench.book)
+    env = dict(os.environ, HOME=str(home), ELF_STORAGE="journal")
+    command = [sys.executable, "-m", "santashelper.elf", "--no-animation"]
+    return lambda: subprocess.run(command, input=b"exit\n", env=env, stdout=subprocess.DEVNULL, check=True)
+
+
+def measure(func, repeat: int, target: float) -> dict:
+    "Median and best seconds per call over repeat loops of about target seconds"
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    number = max(1, int(target / first)) if first > 0 else 1
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        runs.append((time.perf_counter() - start) / number)
+    return {"seconds": statistics.median(runs), "best": min(runs), "number": number, "repeat": repeat}
+
+
+def peak_memory(func) -> int:
+    "Peak of bytes allocated during a single call"
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_scenarios(bench: Bench, repeat: int = 5, target: float = 0.05, memory: bool = True, only=None) -> dict:
+    "Results of scenarios whose name contains any of `only` (all by default)"
+    results = {}
+    for name, prepare in SCENARIOS.items():
+        if only and not any(part in name for part in only):
+            continue
+        func = prepare(bench)
+        results[name] = measure(func, repeat, target)
+        if memory:
+            results[name]["peak_bytes"] = peak_memory(func)
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Lines comparing scenarios present in both results; a line starts with
+    'REGRESSION' when time or peak memory grew more than threshold times"""
+    lines = []
+    for name, now in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        ratio = now["seconds"] / before["seconds"] if before["seconds"] else 1.0
+        line = f"{name:<32}{duration(before['seconds']):>12}{duration(now['seconds']):>12}{ratio:8.2f}x"
+        slower = ratio > threshold
+        if "peak_bytes" in now and before.get("peak_bytes"):
+            mem_ratio = now["peak_bytes"] / before["peak_bytes"]
+            line += f"{mem_ratio:8.2f}x mem"
+            slower = slower or (mem_ratio > threshold and now["peak_bytes"] - before["peak_bytes"] > 1 << 16)
+        lines.append(("REGRESSION " if slower else "           ") + line)
+    return lines
+
+
+def duration(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.2f} us"
+
+
+def report(results: dict) -> str:
+    lines = [f"{'scenario':<32}{'median':>12}{'best':>12}{'peak memory':>15}"]
+    for name, res in results["scenarios"].items():
+        peak = f"{res['peak_bytes'] / 1024:.1f} KB" if "peak_bytes" in res else ""
+        lines.append(f"{name:<32}{duration(res['seconds']):>12}{duration(res['best']):>12}{peak:>15}")
+    return "\n".join(lines)
+
+
+def parse_size(value: str) -> int:
+    return SIZES.get(value.lower()) or int(value)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark santashelper on a synthetic book")
+    parser.add_argument("--size", type=parse_size, default=SIZES["1k"], help="1k, 100k, 1m or number of children")
+    parser.add_argument("--notes", type=int, help="number of notes, a tenth of children by default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--target", type=float, default=0.05, help="seconds per timed loop")
+    parser.add_argument("--only", nargs="*", help="run scenarios containing any of these parts")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc peaks")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare with results JSON")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio to baseline reported as regression")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    book = generate_book(args.size, args.notes, args.seed)
+    build_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as workdir:
+        bench = Bench(book, workdir, args.seed)
+        scenarios = run_scenarios(bench, args.repeat, args.target, not args.no_memory, args.only)
+    results = {
+        "meta": {
+            "children": args.size,
+            "notes": len(book.notes.data),
+            "seed": args.seed,
+            "build_seconds": build_seconds,
+            "python": platform.python_version(),
+            "numpy": np is not None,
+            "created": dt.datetime.now().isoformat(timespec="seconds"),
+        },
+        "scenarios": scenarios,
+    }
+    print(report(results))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["meta"]["children"] != args.size:
+            print(f"Baseline was taken on {baseline['meta']['children']} children, not {args.size}")
+        lines = compare(results, baseline, args.threshold)
+        print("\n".join(lines))
+        if any(line.startswith("REGRESSION") for line in lines):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,152 @@
 import calendar
 import datetime as dt
 from collections import UserDict, defaultdict
+from itertools import islice
 
 from .Record import *
 from .Notes import *
+from .Indexes import *
+from .QueryCache import QueryCache
+from .BirthdayEngine import upcoming, ages
+
+
+def birthdays_report(records, delta: int, today: dt.date = None):
+    "Congratulation days for records with birthday in the next delta days"
+    upcoming_birthdays = defaultdict(list)
+    today = dt.datetime.today().date() if today is None else today
+    children, ordinals = [], []
+    for rec in records:
+        if rec.birthday is None:
+            continue
+        children.append(rec.name.value)
+        ordinals.append(rec.birthday.ordinal)
+
+    for pos, cong_day in upcoming(ordinals, today, delta):
+        upcoming_birthdays[(cong_day, cong_day.weekday())].append(children[pos])
+
+    if not upcoming_birthdays:
+        return f"No upcoming birthdays for {delta} days"
+
+    sorted_result = dict(sorted(upcoming_birthdays.items()))
+    result = ""
+    for cong_day, names in sorted_result.items():
+        result += "{:<10}({}): ".format(calendar.day_name[cong_day[1]], cong_day[0].strftime("%d.%m.%Y"))
+        result += ", ".join(names) + "\n"
+
+    return result.strip("\n")
 
 
 class AddressBook(UserDict[Name, Record]):
     def __init__(self):
         super().__init__()
         self.notes = Notes()
+        self.changed = set()
+        self.build_indexes()
+
+    def build_indexes(self):
+        "Create secondary indexes and an empty query cache over current records"
+        self.generation = 0  # bumped on every change, cached query results of older generations are stale
+        self.cache = QueryCache()
+        self.trigrams = TrigramIndex()
+        self.phone_index = KeyIndex(phone_keys)
+        self.email_index = KeyIndex(email_keys)
+        self.birthdays = BirthdayIndex()
+        self.names = NameIndex()
+        self.by_birthday = SortedIndex(birthday_key)
+        self.by_wishlist = SortedIndex(wishlist_key)
+        self.indexes = [
+            self.trigrams, self.phone_index, self.email_index, self.birthdays,
+            self.names, self.by_birthday, self.by_wishlist,
+        ]
+        # sort key -> index and whether it is read backwards
+        self.sorted_views = {
+            "name": (self.names, False),
+            "birthday": (self.by_birthday, False),
+            "age": (self.by_birthday, True),
+            "wishlist": (self.by_wishlist, False),
+        }
+        for index in self.indexes:
+            index.add_many(self.data.values())
 
     def add_record(self, rec: Record):
         if str(rec.name) in self.data.keys():
             raise KeyError(f"Child with name {rec.name} exists")
+        for field in rec.phones + [rec.email]:
+            if field is not None:
+                self.check_unique(rec, field)
+        self.put_record(rec)
+
+    def add_records(self, records) -> list:
+        """Add many new records as add_record does, returns (position, error)
+        pairs of the rejected ones. Phones and emails are indexed one by one
+        as later records are checked against them, the other indexes take
+        all added records at once"""
+        key_indexes = (self.phone_index, self.email_index)
+        added, rejected = [], []
+        try:
+            for pos, rec in enumerate(records):
+                try:
+                    if str(rec.name) in self.data:
+                        raise KeyError(f"Child with name {rec.name} exists")
+                    for field in rec.phones + [rec.email]:
+                        if field is not None:
+                            self.check_unique(rec, field)
+                except (KeyError, IncorrectFormatException) as err:
+                    rejected.append((pos, err))
+                    continue
+                rec.book = self
+                self.data[str(rec.name)] = rec
+                self.generation += 1
+                self.changed.add(str(rec.name))
+                for index in key_indexes:
+                    index.add(rec)
+                added.append(rec)
+        finally:
+            for index in self.indexes:
+                if index not in key_indexes:
+                    index.add_many(added)
+        return rejected
+
+    def put_record(self, rec: Record):
+        "Store record without existence check, used on journal replay"
+        rec.book = self
         self.data[str(rec.name)] = rec
+        self.record_changed(rec)
+
+    def record_changed(self, rec: Record):
+        self.generation += 1
+        self.changed.add(str(rec.name))
+        for index in self.indexes:
+            index.add(rec)
+
+    def check_unique(self, rec: Record, field: Field):
+        "Reject phone or email that belongs to another child"
+        if isinstance(field, Phone):
+            owner = self.phone_owner(field.value)
+        elif isinstance(field, Email):
+            owner = self.email_owner(field.value)
+        else:
+            return
+        if owner is not None and owner != str(rec.name):
+            raise IncorrectFormatException(f"{field} already belongs to {owner}")
+
+    def phone_owner(self, phone: str):
+        return self.phone_index.get(phone)
+
+    def email_owner(self, email: str):
+        return self.email_index.get(email.lower())
+
+    def find_by_phone(self, phone: str):
+        name = self.phone_owner(Phone(phone).value)
+        if name is None:
+            raise KeyError(f"Contact with phone {phone} not found")
+        return self.data[name]
+
+    def find_by_email(self, email: str):
+        name = self.email_owner(email)
+        if name is None:
+            raise KeyError(f"Contact with email {email} not found")
+        return self.data[name]
 
     def add_note(self, text: str):
         return self.notes.add(Note(text))
@@ -26,78 +158,118 @@ class AddressBook(UserDict[Name, Record]):
         else:
             return contacts
 
+    def iter_records(self, offset: int = 0, limit: int = None, sort: str = None, desc: bool = False):
+        """Records from offset, at most limit of them, without copying the book.
+        Insertion order, or the order of a SORT_KEYS index read straight from it"""
+        if sort is None:
+            records = reversed(self.data.values()) if desc else self.data.values()
+            return islice(records, offset, None if limit is None else offset + limit)
+        index, backwards = self.sorted_views[sort]
+        return (self.data[name] for name in index.page(offset, limit, desc != backwards))
+
     def find(self, name: str):
         rec = self.data.get(name)
         if rec is None:
-            raise KeyError(f"Contact with name {name} not found")
+            raise self.not_found(name)
         return rec
 
+    def suggest_names(self, name: str, limit: int = 3) -> list:
+        "Names a typo or two away from name, closest first"
+        return self.names.closest(name, typo_distance(name), limit)
+
+    def not_found(self, name: str) -> KeyError:
+        "Error for a missing child, with the names the operator may have meant"
+        message = f"Contact with name {name} not found"
+        suggestions = self.suggest_names(name)
+        if len(suggestions) > 1:
+            message += f", did you mean {', '.join(suggestions[:-1])} or {suggestions[-1]}?"
+        elif suggestions:
+            message += f", did you mean {suggestions[0]}?"
+        return KeyError(message)
+
     def delete(self, name: str):
         try:
-            self.data.pop(name)
+            rec = self.data.pop(name)
         except KeyError:
-            raise KeyError(f"Contact with name {name} not found")
+            raise self.not_found(name)
+        rec.book = None
+        self.generation += 1
+        self.changed.add(name)
+        for index in self.indexes:
+            index.discard(name)
 
     def get_birthdays_per_days(self, delta: int):
-        upcoming_birthdays = defaultdict(list)
+        if len(self.data) == 0:
+            raise KeyError("No contacts in address book")
         today = dt.datetime.today().date()
-        for rec in self.get_all_contacts():
-            if rec.birthday is None:
-                continue
-            birthday = rec.birthday.value.date()
-            try:  # can be ValueError here if the birthday is on February 29
-                next_birthday = birthday.replace(year=today.year)
-            except ValueError:
-                next_birthday = dt.datetime(today.year, 2, 28)
-
-            if next_birthday < today:
-                next_birthday = next_birthday.replace(year=today.year + 1)
-
-            if next_birthday.weekday() == 5:
-                next_birthday = next_birthday + dt.timedelta(days=2)
-            if next_birthday.weekday() == 6:
-                next_birthday = next_birthday + dt.timedelta(days=1)
-
-            delta_days = (next_birthday - today).days
-
-            if 0 <= delta_days < delta:
-                day_of_the_week = next_birthday.weekday()
-                user_name = rec.name.value
-                upcoming_birthdays[(next_birthday, day_of_the_week)].append(user_name)
-
-        if not upcoming_birthdays:
-            return f"No upcoming birthdays for {delta} days"
-
-        sorted_result = dict(sorted(upcoming_birthdays.items()))
-        result = ""
-        for cong_day, names in sorted_result.items():
-            result += "{:<10}({}): ".format(calendar.day_name[cong_day[1]], cong_day[0].strftime("%d.%m.%Y"))
-            result += ", ".join(names) + "\n"
-        
-        return result.strip("\n")
+        # the report depends on the day too, so it goes stale at midnight
+        return self.cache.get(
+            ("birthdays", delta), (self.generation, today), lambda: self.__birthdays_report(delta, today)
+        )
+
+    def __birthdays_report(self, delta: int, today: dt.date):
+        days = self.get_birthdays_between(today, today + dt.timedelta(days=delta - 1))
+        records = (self.data[name] for name in self.in_book_order(name for _, names in days for name in names))
+        return birthdays_report(records, delta, today)
+
+    def get_birthday_records(self, delta: int):
+        "List of records with congratulation day in the next delta days"
+        today = dt.datetime.today().date()
+        days = self.get_birthdays_between(today, today + dt.timedelta(days=delta - 1))
+        records = [self.data[name] for name in self.in_book_order(name for _, names in days for name in names)]
+        found = upcoming([rec.birthday.ordinal for rec in records], today, delta)
+        return [records[pos] for pos, _ in found]
+
+    def in_book_order(self, names) -> list:
+        "Names sorted by the place of their records in the book"
+        return sorted(names, key=self.trigrams.order.get)
+
+    def get_birthdays_between(self, start: dt.date, end: dt.date):
+        "List of (date, names) for birthdays from start to end inclusive"
+        result = []
+        for year in range(start.year, end.year + 1):
+            first = day_of_year(start) if year == start.year else 1
+            last = day_of_year(end) if year == end.year else 366
+            if last == FEB_28 and not calendar.isleap(year):
+                last = FEB_29  # celebrated on February 28
+            for doy, names in self.birthdays.between(first, last):
+                day = dt.date(2000, 1, 1) + dt.timedelta(days=doy - 1)
+                if doy == FEB_29 and not calendar.isleap(year):
+                    day = dt.date(year, 2, 28)
+                else:
+                    day = day.replace(year=year)
+                if result and result[-1][0] == day:
+                    result[-1][1].extend(names)
+                else:
+                    result.append((day, names))
+        return result
+
+    def get_ages(self):
+        "Dict of child name -> age for children with birthday"
+        names = [name for name, rec in self.data.items() if rec.birthday is not None]
+        ordinals = [self.data[name].birthday.ordinal for name in names]
+        return dict(zip(names, ages(ordinals, dt.datetime.today().date())))
+
+    def get_birthdays_in_month(self, month: int, year: int = None):
+        "List of (date, names) for birthdays in the month"
+        year = dt.datetime.today().year if year is None else year
+        last_day = calendar.monthrange(year, month)[1]
+        return self.get_birthdays_between(dt.date(year, month, 1), dt.date(year, month, last_day))
 
     def __str__(self):
         if len(self.data):
-            return "\n".join(map(str, self.get_all_contacts()))
+            return "\n".join(map(str, self.data.values()))
         else:
             return "No contacts in address book"
 
     def search(self, search_str: str):
-        found_contacts = []
-
-        for rec in self.get_all_contacts():
-            user_info = str(rec.name)
-            if rec.phones:
-                user_info += ", " + ", ".join(str(phone) for phone in rec.phones)
-            if rec.birthday is not None:
-                user_info += ", " + str(rec.birthday)
-            if rec.email is not None:
-                user_info += ", " + str(rec.email)
-            if rec.address is not None:
-                user_info += ", " + str(rec.address)
-
-            if search_str.lower() in user_info.lower():
-                found_contacts.append(rec)
+        if len(self.data) == 0:
+            raise KeyError("No contacts in address book")
+
+        names = self.cache.get(
+            ("search", search_str.lower()), self.generation, lambda: self.trigrams.search(search_str)
+        )
+        found_contacts = [self.data[name] for name in names]
 
         if not found_contacts:
             raise IncorrectFormatException("No contacts found")
@@ -107,3 +279,18 @@ class AddressBook(UserDict[Name, Record]):
     def get_contact_names(self):
         "return List of contact names"
         return list(map(str, self.data.keys()))
+
+    def complete_names(self, prefix: str, limit: int = None):
+        "return List of contact names starting with prefix, case insensitive"
+        return self.names.complete(prefix, limit)
+
+    def __getstate__(self):
+        return {"data": self.data, "notes": self.notes}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.changed = set()
+        for rec in self.data.values():
+            rec.book = self
+        self.build_indexes()
+
@@ -0,0 +1,86 @@
+import datetime as dt
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, pure python is used without it
+    np = None
+
+EPOCH = dt.date(1970, 1, 1).toordinal()
+
+
+def next_birthday(birthday: dt.date, today: dt.date) -> dt.date:
+    "Closest anniversary of birthday not before today, February 29 falls on February 28"
+    for year in (today.year, today.year + 1):
+        try:
+            day = birthday.replace(year=year)
+        except ValueError:
+            day = dt.date(year, 2, 28)
+        if day >= today:
+            return day
+
+
+def congratulation_day(day: dt.date) -> dt.date:
+    "Birthdays on weekend are celebrated on Monday"
+    if day.weekday() == 5:
+        return day + dt.timedelta(days=2)
+    if day.weekday() == 6:
+        return day + dt.timedelta(days=1)
+    return day
+
+
+def upcoming(ordinals, today: dt.date, delta: int) -> list:
+    """Pairs (position, congratulation day) for birthday ordinals celebrated
+    in the next delta days, computed with numpy when it is installed."""
+    if np is not None and len(ordinals) > 0:
+        return _upcoming_numpy(np.asarray(ordinals, dtype=np.int64), today, delta)
+    result = []
+    for pos, ordinal in enumerate(ordinals):
+        day = congratulation_day(next_birthday(dt.date.fromordinal(ordinal), today))
+        if 0 <= (day - today).days < delta:
+            result.append((pos, day))
+    return result
+
+
+def ages(ordinals, today: dt.date) -> list:
+    "Full years for birthday ordinals at today"
+    if np is not None and len(ordinals) > 0:
+        births = _as_days(np.asarray(ordinals, dtype=np.int64))
+        years = births.astype("M8[Y]").astype(np.int64) + 1970
+        month_day = (births.astype("M8[M]").astype(np.int64) % 12 + 1) * 100 + _day_in_month(births) + 1
+        not_yet = (today.month * 100 + today.day) < month_day
+        return (today.year - years - not_yet).tolist()
+    result = []
+    for ordinal in ordinals:
+        birth = dt.date.fromordinal(ordinal)
+        result.append(today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day)))
+    return result
+
+
+def _as_days(ordinals):
+    return (ordinals - EPOCH).astype("M8[D]")
+
+
+def _day_in_month(days):
+    return (days - days.astype("M8[M]").astype("M8[D]")).astype(np.int64)
+
+
+def _anniversary(births, year: int):
+    "Birthdays moved to year, February 29 is clipped to February 28"
+    month = births.astype("M8[M]").astype(np.int64) % 12
+    month_start = np.datetime64(f"{year:04d}-01", "M") + month
+    month_len = ((month_start + 1).astype("M8[D]") - month_start.astype("M8[D]")).astype(np.int64)
+    return month_start.astype("M8[D]") + np.minimum(_day_in_month(births), month_len - 1)
+
+
+def _upcoming_numpy(ordinals, today: dt.date, delta: int) -> list:
+    births = _as_days(ordinals)
+    today64 = np.datetime64(today, "D")
+    days = _anniversary(births, today.year)
+    passed = days < today64
+    if passed.any():
+        days = np.where(passed, _anniversary(births, today.year + 1), days)
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was Thursday
+    days = days + np.where(weekday == 5, 2, np.where(weekday == 6, 1, 0))
+    left = (days - today64).astype(np.int64)
+    positions = np.flatnonzero((left >= 0) & (left < delta))
+    return list(zip(positions.tolist(), days[positions].astype(object).tolist()))
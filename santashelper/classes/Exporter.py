@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+from pathlib import Path
+
+from .AddressBook import *
+
+COLUMNS = ("name", "phones", "email", "birthday", "address", "wishlist")
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".json": "jsonl", ".vcf": "vcard", ".vcard": "vcard"}
+
+
+def record_row(rec: Record) -> dict:
+    "Record as dict with the columns read by Importer"
+    return {
+        "name": rec.name.value,
+        "phones": [phone.value for phone in rec.phones],
+        "email": rec.email.value if rec.email is not None else None,
+        "birthday": str(rec.birthday) if rec.birthday is not None else None,
+        "address": rec.address.value if rec.address is not None else None,
+        "wishlist": [item.value for item in rec.wishlist],
+    }
+
+
+def csv_chunks(records, chunk: int = 1000):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for count, rec in enumerate(records, 1):
+        row = record_row(rec)
+        row["phones"] = ";".join(row["phones"])
+        row["wishlist"] = ";".join(row["wishlist"])
+        writer.writerow(row[column] or "" for column in COLUMNS)
+        if count % chunk == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def jsonl_chunks(records, chunk: int = 1000):
+    lines = []
+    for rec in records:
+        lines.append(json.dumps(record_row(rec), ensure_ascii=False) + "\n")
+        if len(lines) == chunk:
+            yield "".join(lines)
+            lines.clear()
+    yield "".join(lines)
+
+
+def vcard_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;").replace("\n", "\\n")
+
+
+def vcard(rec: Record) -> str:
+    "vCard 3.0 of a record"
+    name = vcard_escape(rec.name.value)
+    lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{name}", f"N:;{name};;;"]
+    lines += [f"TEL:{phone.value}" for phone in rec.phones]
+    if rec.email is not None:
+        lines.append(f"EMAIL:{vcard_escape(rec.email.value)}")
+    if rec.address is not None:
+        lines.append(f"ADR:;;{vcard_escape(rec.address.value)};;;;")
+    if rec.birthday is not None:
+        lines.append(f"BDAY:{rec.birthday.value.date().isoformat()}")
+    if rec.wishlist:
+        lines.append("NOTE:" + vcard_escape("Wishlist: " + ", ".join(item.value for item in rec.wishlist)))
+    lines.append("END:VCARD")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def vcard_chunks(records, chunk: int = 1000):
+    cards = []
+    for rec in records:
+        cards.append(vcard(rec))
+        if len(cards) == chunk:
+            yield "".join(cards)
+            cards.clear()
+    yield "".join(cards)
+
+
+WRITERS = {"csv": csv_chunks, "jsonl": jsonl_chunks, "vcard": vcard_chunks}
+
+
+def export_file(path: Path, records, fmt: str = None) -> int:
+    """Write records to path as csv, jsonl or vcard (by default taken from the
+    file extension), returns number of exported records"""
+    path = Path(path)
+    fmt = fmt or FORMATS.get(path.suffix.lower())
+    if fmt not in WRITERS:
+        raise IncorrectFormatException("Export format must be csv, jsonl or vcard")
+    counter = Counted(records)
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        for chunk in WRITERS[fmt](counter):
+            fh.write(chunk)
+    return counter.count
+
+
+class Counted:
+    "Iterator wrapper counting passed items"
+
+    def __init__(self, items):
+        self.items = iter(items)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self.items)
+        self.count += 1
+        return item
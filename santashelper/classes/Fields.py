@@ -1,6 +1,22 @@
 import re
 from datetime import datetime
 
+from .BirthdayEngine import ages
+
+NOT_DIGITS = re.compile(r"[^\d\.]")
+EMAIL = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+DATE = re.compile(r"([0-9]{1,2})\.([0-9]{1,2})\.([0-9]{4})")
+
+
+def parse_date(value: str) -> datetime:
+    "datetime from DD.MM.YYYY text, raises ValueError as strptime does"
+    match = DATE.fullmatch(value)
+    if match is None:
+        raise ValueError(f"{value} does not match DD.MM.YYYY")
+    day, month, year = match.groups()
+    return datetime(int(year), int(month), int(day))
+
+
 class IncorrectFormatException(Exception):
     pass
 
@@ -14,14 +30,45 @@ class NotesNotFoundError(Exception):
 class NotFoundError(Exception):
     pass
 
-class Field:
-    __value = None
+class BaseField:
+    "Parsing and comparison of fields, subclasses decide how the value is stored"
+    __slots__ = ()
 
     def __init__(self, value: str):
         self.value = value
 
     def parse(self, data: str):
         return data
+
+    @classmethod
+    def parse_many(cls, values) -> tuple:
+        "Parsed values (None for invalid) and list of (position, error) for iterable of strings"
+        field = cls.__new__(cls)
+        parsed, errors = [], []
+        for pos, value in enumerate(values):
+            try:
+                parsed.append(field.parse(value))
+            except IncorrectFormatException as err:
+                parsed.append(None)
+                errors.append((pos, str(err)))
+        return parsed, errors
+
+    def __str__(self):
+        return str(self.value)
+
+    def __eq__(self, other):
+        return self.value == other
+
+
+class Field(BaseField):
+    __slots__ = ("__value",)
+
+    @classmethod
+    def restore(cls, value):
+        "Create field from already parsed value, skipping validation"
+        field = cls.__new__(cls)
+        field.__value = value
+        return field
     
     @property
     def value(self):
@@ -31,59 +78,147 @@ class Field:
     def value(self, data: str):
         self.__value = self.parse(data)
 
-    def __str__(self):
-        return str(self.value)
+    def __getstate__(self):
+        return {"_Field__value": self.__value}
 
-    def __eq__(self, other):
-        return self.value == other
+    def __setstate__(self, state):
+        # same state as the instance __dict__ of fields pickled before __slots__
+        self.__value = state["_Field__value"]
 
 
 class Name(Field):
+    __slots__ = ()
+
     def __hash__(self):
         return hash(self.value)
 
 
 class Phone(Field):
+    __slots__ = ()
+
+    ERROR = "Phone must have 10 digits"
+
     def parse(self, value: str):
-        value = re.sub("[^\d\.]", "", value)
+        value = NOT_DIGITS.sub("", value)
         if len(value) != 10 or not value.isdecimal():
-            raise IncorrectFormatException("Phone must have 10 digits")
+            raise IncorrectFormatException(self.ERROR)
         return value
 
+    @classmethod
+    def parse_many(cls, values) -> tuple:
+        sub = NOT_DIGITS.sub
+        parsed, errors = [], []
+        for pos, value in enumerate(values):
+            value = sub("", value)
+            if len(value) == 10 and value.isdecimal():
+                parsed.append(value)
+            else:
+                parsed.append(None)
+                errors.append((pos, cls.ERROR))
+        return parsed, errors
+
 
 class Address(Field):
-    pass
+    __slots__ = ()
 
 
 class Email(Field):
+    __slots__ = ()
+
+    ERROR = 'Incorrect email format'
+
     def parse(self, value: str):
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(pattern, value):
-            raise IncorrectFormatException('Incorrect email format')
+        if not EMAIL.match(value):
+            raise IncorrectFormatException(self.ERROR)
         return value
 
+    @classmethod
+    def parse_many(cls, values) -> tuple:
+        match = EMAIL.match
+        parsed, errors = [], []
+        for pos, value in enumerate(values):
+            if match(value):
+                parsed.append(value)
+            else:
+                parsed.append(None)
+                errors.append((pos, cls.ERROR))
+        return parsed, errors
+
+
+class Birthday(BaseField):
+    "Birthday kept as date ordinal only, value gives it as datetime"
+    __slots__ = ("ordinal",)
+
+    @classmethod
+    def restore(cls, value):
+        field = cls.__new__(cls)
+        field.ordinal = value.toordinal()
+        return field
+
+    @property
+    def value(self):
+        return datetime.fromordinal(self.ordinal)
+
+    @value.setter
+    def value(self, data: str):
+        self.ordinal = self.parse(data).toordinal()
+
+    ERROR = 'Birthday must be in format DD.MM.YYYY'
+    OUTGROWN = "Alas, it seems this little one has outgrown their childlike wonder"
+    MAX_AGE = 16
 
-class Birthday(Field):
     def parse(self, value):
         try:
-            birthdate = datetime.strptime(value, '%d.%m.%Y')
+            birthdate = parse_date(value)
             self._validate_age(birthdate)
             return birthdate
         except ValueError:
-            raise IncorrectFormatException(
-                'Birthday must be in format DD.MM.YYYY')
+            raise IncorrectFormatException(self.ERROR)
+
+    @classmethod
+    def parse_many(cls, values, today=None) -> tuple:
+        "Ages are checked at once for the whole batch against the same today"
+        today = datetime.now().date() if today is None else today
+        parsed, errors, ordinals, positions = [], [], [], []
+        for pos, value in enumerate(values):
+            try:
+                birthdate = parse_date(value)
+            except ValueError:
+                parsed.append(None)
+                errors.append((pos, cls.ERROR))
+                continue
+            parsed.append(birthdate)
+            ordinals.append(birthdate.toordinal())
+            positions.append(pos)
+        for pos, age in zip(positions, ages(ordinals, today)):
+            if age > cls.MAX_AGE:
+                parsed[pos] = None
+                errors.append((pos, cls.OUTGROWN))
+        errors.sort()
+        return parsed, errors
 
     def __str__(self):
         return self.value.strftime("%d.%m.%Y")
 
+    def __getstate__(self):
+        return {"ordinal": self.ordinal}
+
+    def __setstate__(self, state):
+        if "ordinal" in state:
+            self.ordinal = state["ordinal"]
+        else:  # pickled with datetime value
+            self.ordinal = state["_Field__value"].toordinal()
+
     def _validate_age(self, birthdate):
         current_date = datetime.now()
         age = current_date.year - birthdate.year - ((current_date.month, current_date.day) < (birthdate.month, birthdate.day))
-        if age > 16:
-            raise IncorrectFormatException("Alas, it seems this little one has outgrown their childlike wonder")      
- 
-        
+        if age > self.MAX_AGE:
+            raise IncorrectFormatException(self.OUTGROWN)
+
+
 class Note(Field):
+    __slots__ = ("tags",)
+
     def __init__(self, value: str):
         super().__init__(value)
         self.tags = set()
@@ -107,6 +242,15 @@ class Note(Field):
             ret += "\ntags: " + ", ".join(self.tags)
         return ret
 
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["tags"] = self.tags
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.tags = state["tags"]
+
 
 class WishlistItem(Field):
-    pass        
+    __slots__ = ()
@@ -1,4 +1,8 @@
+from pathlib import Path
+
 from .AddressBook import *
+from .Importer import import_file
+from .Exporter import export_file
 
 
 def input_error(msg):
@@ -6,9 +10,12 @@ def input_error(msg):
 
     def decorator(func):
         def inner(*args, **kwargs):
+            # the worker remembers the last error for batch mode reports
+            args[0].last_error = None
             try:
                 return func(*args, **kwargs)
             except (ValueError, IndexError):
+                args[0].last_error = msg
                 return msg
             except (
                 IncorrectFormatException,
@@ -17,6 +24,7 @@ def input_error(msg):
                 NotFoundError,
                 KeyError,
             ) as err:
+                args[0].last_error = err
                 return err
 
         return inner
@@ -24,7 +32,42 @@ def input_error(msg):
     return decorator
 
 
+def page_options(args) -> dict:
+    "list_children page from --offset=N, --limit=N, --sort=<key> and --desc"
+    options = {"offset": 0, "limit": 5, "sort": None, "desc": False}
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if arg == "--desc":
+            options["desc"] = True
+        elif key == "--sort" and value in SORT_KEYS:
+            options["sort"] = value
+        elif key in ("--offset", "--limit") and sep:
+            options[key[2:]] = int(value)
+        else:
+            raise ValueError(arg)
+    if options["offset"] < 0 or options["limit"] < 1:
+        raise ValueError("Page out of range")
+    return options
+
+
+def birthday_days(arg: str) -> int:
+    "Birthday window in days, from 1 to 365 so it never wraps into next year"
+    days = int(arg)
+    if days < 1 or days > 365:
+        raise IncorrectFormatException("Days must be a positive number not greater than 365")
+    return days
+
+
+def turn_page(args: list, step: int) -> list:
+    "list_children arguments of the page step pages away"
+    options = page_options(args)
+    offset = max(0, options["offset"] + step * options["limit"])
+    return [arg for arg in args if not arg.startswith("--offset=")] + [f"--offset={offset}"]
+
+
 class HelpWorker:
+    last_error = None
+
     @input_error("Give me name and info please.")
     def add_contact(self, args, contacts: AddressBook):
         name, info = args
@@ -113,31 +156,69 @@ class HelpWorker:
 
     @input_error("Give me number of days please")
     def get_birthdays_per_days(self, args, contacts: AddressBook):
-        days = int(args[0])
-        if days < 1 or days > 365:
-            raise IncorrectFormatException("Days must be a positive number not greater than 365")
-        return contacts.get_birthdays_per_days(days)
-
-    def print_all(self, contacts: AddressBook):
-        chunk_size = 5
-        items = list(contacts.values())
-        total_items = len(items)
-        if not total_items:
-            return "Address book is empty."
-        start_index = 0
-
-        while start_index < total_items:
-            end_index = min(start_index + chunk_size, total_items)
-            current_chunk = items[start_index:end_index]
-
-            for value in current_chunk:
-                print(value)
+        return contacts.get_birthdays_per_days(birthday_days(args[0]))
 
-            if end_index < total_items:
-                input("Press Enter to continue...")
-
-            start_index = end_index
-        return "End of addres book"
+    @input_error("Give me CSV or JSONL file please.")
+    def import_contacts(self, args, contacts: AddressBook):
+        path = Path(args[0]).expanduser()
+        try:
+            report = import_file(path, contacts)
+        except OSError as err:
+            self.last_error = f"Can't read {path}: {err.strerror}"
+            return self.last_error
+        if not report.errors:
+            return str(report)
+        errors_path = path.with_name(path.name + ".errors")
+        try:
+            with open(errors_path, "w", encoding="utf-8") as fh:
+                fh.writelines(f"line {line}: {message}\n" for line, message in report.errors)
+        except OSError as err:
+            self.last_error = f"{report}, can't write {errors_path}: {err.strerror}"
+            return self.last_error
+        return f"{report}, see {errors_path}"
+
+    @input_error("Give me file, optionally followed by 'search <text>' or 'birthdays <days>' please.")
+    def export_contacts(self, args, contacts: AddressBook):
+        path = Path(args[0]).expanduser()
+        if len(args) == 1:
+            records = contacts.data.values()
+        elif args[1] == "search":
+            records = contacts.search(" ".join(args[2:]))
+        elif args[1] == "birthdays":
+            records = contacts.get_birthday_records(birthday_days(args[2]))
+        else:
+            raise ValueError
+        try:
+            count = export_file(path, records)
+        except OSError as err:
+            self.last_error = f"Can't write {path}: {err.strerror}"
+            return self.last_error
+        return f"Exported {count} children to {path}"
+
+    @input_error("Give me month number please")
+    def get_birthdays_in_month(self, args, contacts: AddressBook):
+        month = int(args[0])
+        if month < 1 or month > 12:
+            raise IncorrectFormatException("Month must be a number from 1 to 12")
+        days = contacts.get_birthdays_in_month(month)
+        if not days:
+            return f"No birthdays in {calendar.month_name[month]}"
+        return "\n".join(f"{day.strftime('%d.%m.%Y')}: {', '.join(names)}" for day, names in days)
+
+    @input_error("Use list_children [--sort=name|birthday|age|wishlist] [--desc] [--offset=N] [--limit=N] please.")
+    def list_children(self, args, contacts: AddressBook):
+        options = page_options(args)
+        offset, limit = options["offset"], options["limit"]
+        records = contacts.iter_records(offset, limit, options["sort"], options["desc"])
+        lines = [str(rec) for rec in records]
+        total = len(contacts)
+        if not total:
+            return "Address book is empty."
+        if not lines:
+            return f"No more children, there are {total} in the book."
+        shown = offset + len(lines)
+        lines.append(f"Children {offset + 1}-{shown} of {total}" + (", type next for more" if shown < total else ""))
+        return "\n".join(lines)
 
     @input_error("Give me name please.")
     def show_contact(self, args, contacts: AddressBook):
@@ -166,6 +247,14 @@ class HelpWorker:
             return "Birthday doesn't setted."
         return f"{name}'s birthday is {rec.birthday}"
 
+    @input_error("Give me phone please.")
+    def find_by_phone(self, args, contacts: AddressBook):
+        return str(contacts.find_by_phone(args[0]))
+
+    @input_error("Give me email please.")
+    def find_by_email(self, args, contacts: AddressBook):
+        return str(contacts.find_by_email(args[0]))
+
     @input_error("Give me argument for search.")
     def search(self, args, contacts: AddressBook):
         search_arg = args[0]
@@ -193,8 +282,9 @@ class HelpWorker:
 
     @input_error("Give text to search please.")
     def search_notes(self, args, book: AddressBook):
-        search_str = args[0]
-        return book.notes.search(search_str)
+        if len(args) == 0:
+            raise IndexError
+        return book.notes.search(" ".join(args))
 
     @input_error("Give me note index please.")
     def del_note(self, args, book: AddressBook):
@@ -223,8 +313,23 @@ class HelpWorker:
 
     @input_error("Give me tag(s) please.")
     def get_taged_notes(self, args, book: AddressBook):
-        tags = set(args)
-        return book.notes.get_taged(tags)
+        "tag - any of tags, +tag - must have tag, -tag - must not have tag"
+        tags, required, excluded = set(), set(), set()
+        for arg in args:
+            if arg.startswith("+") and len(arg) > 1:
+                required.add(arg[1:])
+            elif arg.startswith("-") and len(arg) > 1:
+                excluded.add(arg[1:])
+            else:
+                tags.add(arg)
+        return book.notes.get_taged(tags, required, excluded)
+
+    @input_error("")
+    def show_tags(self, args, book: AddressBook):
+        counts = book.notes.tag_counts()
+        if not counts:
+            raise NotesNotFoundError("No tagged notes.")
+        return "\n".join(f"{tag}: {count}" for tag, count in sorted(counts.items()))
 
     @input_error("Give me name for child and item(s) for wishlist")
     def add_wishlist_items(self, args, book: AddressBook):
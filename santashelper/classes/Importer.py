@@ -0,0 +1,151 @@
+import csv
+import gc
+import json
+from itertools import islice
+from pathlib import Path
+
+from .AddressBook import *
+
+
+class ImportReport:
+    "Result of import_file: number of added children and rejected rows"
+
+    def __init__(self):
+        self.added = 0
+        self.errors = []
+
+    def reject(self, line: int, message):
+        self.errors.append((line, str(message)))
+
+    def __str__(self):
+        res = f"Imported {self.added} children"
+        if self.errors:
+            res += f", rejected {len(self.errors)} rows"
+        return res
+
+
+def read_rows(path: Path):
+    "Stream (line number, row dict) pairs from a CSV or JSONL file"
+    path = Path(path)
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(fh)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line, text in enumerate(fh, 1):
+                if text.strip():
+                    try:
+                        yield line, json.loads(text)
+                    except json.JSONDecodeError as err:
+                        yield line, err
+
+
+def split_list(value) -> list:
+    "List column given as JSON list or ';' separated text"
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(";") if item.strip()]
+    return [str(item) for item in value]
+
+
+def parse_column(rows: list, key: str, field: type, errors: dict) -> list:
+    "Values of a column parsed by field.parse_many, errors are added per row"
+    positions = [pos for pos, row in enumerate(rows) if row.get(key)]
+    parsed, failed = field.parse_many([str(rows[pos][key]) for pos in positions])
+    for pos, message in failed:
+        errors.setdefault(positions[pos], message)
+    column = [None] * len(rows)
+    for pos, value in zip(positions, parsed):
+        column[pos] = value
+    return column
+
+
+def validate_batch(batch: list) -> list:
+    """Triples of line number, normalized values and error message for a
+    batch of rows; columns are validated at once with Field.parse_many"""
+    rows, errors = [], {}
+    for pos, (line, row) in enumerate(batch):
+        if not isinstance(row, dict):
+            errors[pos] = f"Broken row: {row}"
+            row = {}
+        elif not str(row.get("name") or "").strip():
+            errors[pos] = "Name is required"
+        rows.append(row)
+
+    phone_rows, phone_values = [], []
+    for pos, row in enumerate(rows):
+        for phone in split_list(row.get("phones") or row.get("phone")):
+            phone_rows.append(pos)
+            phone_values.append(phone)
+    parsed, failed = Phone.parse_many(phone_values)
+    for pos, message in failed:
+        errors.setdefault(phone_rows[pos], message)
+    phones = [[] for _ in rows]
+    for pos, phone in zip(phone_rows, parsed):
+        phones[pos].append(phone)
+
+    emails = parse_column(rows, "email", Email, errors)
+    birthdays = parse_column(rows, "birthday", Birthday, errors)
+
+    result = []
+    for pos, (line, _) in enumerate(batch):
+        if pos in errors:
+            result.append((line, None, errors[pos]))
+            continue
+        row = rows[pos]
+        address = str(row["address"]) if row.get("address") else None
+        values = (str(row["name"]).strip(), phones[pos], emails[pos], birthdays[pos], address,
+                  split_list(row.get("wishlist")))
+        result.append((line, values, None))
+    return result
+
+
+def build_record(values: tuple) -> Record:
+    "Record from already validated values"
+    name, phones, email, birthday, address, wishlist = values
+    rec = Record(name)
+    rec.phones = [Phone.restore(phone) for phone in phones]
+    rec.email = Email.restore(email) if email else None
+    rec.birthday = Birthday.restore(birthday) if birthday else None
+    rec.address = Address.restore(address) if address else None
+    rec.wishlist = [WishlistItem.restore(item) for item in wishlist]
+    return rec
+
+
+def batches(rows, size: int):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def import_file(path: Path, book: AddressBook, batch_size: int = 1000) -> ImportReport:
+    "Add children from CSV or JSONL file to the book, invalid rows go to the report"
+    report = ImportReport()
+    lines = []
+
+    def records():
+        for batch in map(validate_batch, batches(read_rows(path), batch_size)):
+            for line, values, error in batch:
+                if error is not None:
+                    report.reject(line, error)
+                else:
+                    lines.append(line)
+                    yield build_record(values)
+
+    # every object made by the import stays alive, so cyclic collections
+    # would only walk the growing heap again and again
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        # one call for the whole file, so the indexes are built in bulk once
+        rejected = book.add_records(records())
+    finally:
+        if enabled:
+            gc.enable()
+    for pos, err in rejected:
+        report.reject(lines[pos], err.args[0])
+    report.added = len(lines) - len(rejected)
+    report.errors.sort(key=lambda error: error[0])
+    return report
@@ -0,0 +1,545 @@
+import datetime as dt
+import math
+import re
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from itertools import islice
+
+from .Record import *
+
+
+def day_of_year(day: dt.date) -> int:
+    "Day number in a leap year, so February 29 keeps its own slot"
+    return dt.date(2000, day.month, day.day).timetuple().tm_yday
+
+
+FEB_28 = day_of_year(dt.date(2000, 2, 28))
+FEB_29 = day_of_year(dt.date(2000, 2, 29))
+
+
+def user_info(rec: Record) -> str:
+    "Lowercased text matched by AddressBook.search"
+    info = str(rec.name)
+    if rec.phones:
+        info += ", " + ", ".join(str(phone) for phone in rec.phones)
+    if rec.birthday is not None:
+        info += ", " + str(rec.birthday)
+    if rec.email is not None:
+        info += ", " + str(rec.email)
+    if rec.address is not None:
+        info += ", " + str(rec.address)
+    return info.lower()
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Trigram -> record names postings over user_info of records.
+
+    A query is answered by intersecting the postings of its trigrams,
+    only the remaining candidates are checked with a substring test.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.texts = {}
+        self.order = {}
+        self.counter = 0
+
+    def add(self, rec: Record):
+        name = str(rec.name)
+        text = user_info(rec)
+        old = self.texts.get(name)
+        if old == text:
+            return
+        if old is None:
+            self.counter += 1
+            self.order[name] = self.counter
+            old_grams = set()
+        else:
+            old_grams = trigrams(old)
+        new_grams = trigrams(text)
+        for gram in old_grams - new_grams:
+            self.__unpost(gram, name)
+        for gram in new_grams - old_grams:
+            self.postings[gram].add(name)
+        self.texts[name] = text
+
+    def add_many(self, records):
+        "Add many records, names not indexed yet are posted without set arithmetic"
+        postings, texts, order = self.postings, self.texts, self.order
+        for rec in records:
+            name = str(rec.name)
+            if name in texts:
+                self.add(rec)
+                continue
+            text = user_info(rec)
+            self.counter += 1
+            order[name] = self.counter
+            texts[name] = text
+            for i in range(len(text) - 2):
+                postings[text[i:i + 3]].add(name)
+
+    def discard(self, name: str):
+        text = self.texts.pop(name, None)
+        if text is None:
+            return
+        del self.order[name]
+        for gram in trigrams(text):
+            self.__unpost(gram, name)
+
+    def search(self, query: str) -> list:
+        "Names of records containing query, in order of adding"
+        query = query.lower()
+        if len(query) < 3:
+            candidates = self.texts.keys()
+        else:
+            postings = sorted((self.postings.get(gram, set()) for gram in trigrams(query)), key=len)
+            candidates = set(postings[0])
+            for names in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= names
+        found = [name for name in candidates if query in self.texts[name]]
+        return sorted(found, key=self.order.get)
+
+    def __unpost(self, gram: str, name: str):
+        names = self.postings[gram]
+        names.discard(name)
+        if not names:
+            del self.postings[gram]
+
+
+class KeyIndex:
+    "Unique key -> record name lookup, keys of a record are given by `keys`"
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.owners = {}
+        self.by_name = {}
+
+    def add(self, rec: Record):
+        name = str(rec.name)
+        keys = self.keys(rec)
+        if self.by_name.get(name) == keys:
+            return
+        self.discard(name)
+        self.by_name[name] = keys
+        for key in keys:
+            self.owners[key] = name
+
+    def add_many(self, records):
+        for rec in records:
+            self.add(rec)
+
+    def discard(self, name: str):
+        for key in self.by_name.pop(name, ()):
+            if self.owners.get(key) == name:
+                del self.owners[key]
+
+    def get(self, key: str):
+        return self.owners.get(key)
+
+
+def phone_keys(rec: Record) -> tuple:
+    return tuple(phone.value for phone in rec.phones)
+
+
+def email_keys(rec: Record) -> tuple:
+    return (rec.email.value.lower(),) if rec.email is not None else ()
+
+
+class BirthdayIndex:
+    "Record names grouped by birthday day of year, days kept sorted for range scans"
+
+    def __init__(self):
+        self.by_day = {}
+        self.days = []
+        self.day_of = {}
+
+    def add(self, rec: Record):
+        name = str(rec.name)
+        doy = day_of_year(dt.date.fromordinal(rec.birthday.ordinal)) if rec.birthday is not None else None
+        if self.day_of.get(name) == doy:
+            return
+        self.discard(name)
+        if doy is None:
+            return
+        self.day_of[name] = doy
+        names = self.by_day.get(doy)
+        if names is None:
+            names = self.by_day[doy] = {}
+            insort(self.days, doy)
+        names[name] = None
+
+    def add_many(self, records):
+        "Add many records, sorting the days once at the end"
+        for rec in records:
+            name = str(rec.name)
+            if name in self.day_of or rec.birthday is None:
+                self.add(rec)
+                continue
+            doy = day_of_year(dt.date.fromordinal(rec.birthday.ordinal))
+            self.day_of[name] = doy
+            self.by_day.setdefault(doy, {})[name] = None
+        if len(self.days) != len(self.by_day):
+            self.days = sorted(self.by_day)
+
+    def discard(self, name: str):
+        doy = self.day_of.pop(name, None)
+        if doy is None:
+            return
+        names = self.by_day[doy]
+        del names[name]
+        if not names:
+            del self.by_day[doy]
+            del self.days[bisect_left(self.days, doy)]
+
+    def between(self, first: int, last: int):
+        "Pairs of day of year and names for days from first to last inclusive"
+        for doy in self.days[bisect_left(self.days, first):bisect_right(self.days, last)]:
+            yield doy, list(self.by_day[doy])
+
+
+class SortedIndex:
+    """Record names ordered by key(rec), kept sorted with bisect insertion.
+
+    Ties are broken by name. Records whose key is None follow the sorted
+    ones in order of adding, in both directions of `page`. Many records at
+    once go through `add_many`, which sorts them once instead of inserting
+    them one by one.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.keys = []
+        self.entry_of = {}
+        self.missing = {}
+
+    def rebuild(self, records):
+        "Index exactly records, sorting once"
+        self.keys = []
+        self.entry_of = {}
+        self.missing = {}
+        self.add_many(records)
+
+    def add_many(self, records):
+        "Add or update records, merging them into the sorted entries with one sort"
+        added = []
+        for name, rec in {str(rec.name): rec for rec in records}.items():
+            value = self.key(rec)
+            entry = None if value is None else (value, name)
+            if name in self.entry_of:
+                if self.entry_of[name] == entry:
+                    continue
+                self.discard(name)
+            self.entry_of[name] = entry
+            if entry is None:
+                self.missing[name] = None
+            else:
+                added.append(entry)
+        if added:
+            # the sort finds the two sorted runs and merges them
+            added.sort()
+            self.keys += added
+            self.keys.sort()
+
+    def add(self, rec: Record):
+        name = str(rec.name)
+        value = self.key(rec)
+        entry = None if value is None else (value, name)
+        if name in self.entry_of and self.entry_of[name] == entry:
+            return
+        self.discard(name)
+        self.entry_of[name] = entry
+        if entry is None:
+            self.missing[name] = None
+        else:
+            insort(self.keys, entry)
+
+    def discard(self, name: str):
+        if name not in self.entry_of:
+            return
+        entry = self.entry_of.pop(name)
+        if entry is None:
+            del self.missing[name]
+        else:
+            del self.keys[bisect_left(self.keys, entry)]
+
+    def page(self, offset: int = 0, limit: int = None, desc: bool = False):
+        "Names from position offset, at most limit of them, without walking the names before"
+        total = len(self.entry_of)
+        end = total if limit is None else min(total, offset + limit)
+        for pos in range(offset, min(end, len(self.keys))):
+            yield self.keys[~pos if desc else pos][1]
+        if end > len(self.keys):
+            yield from islice(self.missing, max(0, offset - len(self.keys)), end - len(self.keys))
+
+
+def name_key(rec: Record) -> str:
+    return str(rec.name).lower()
+
+
+def birthday_key(rec: Record):
+    return rec.birthday.ordinal if rec.birthday is not None else None
+
+
+def wishlist_key(rec: Record) -> int:
+    return len(rec.wishlist)
+
+
+# list_children sort keys; age is the birthday order turned around
+SORT_KEYS = ("name", "birthday", "age", "wishlist")
+
+
+def next_row(row: list, word: str, text: str, before: list = None) -> list:
+    """Edit distances of word prefixes to text, given the rows for text
+    without its last char (row) and without its last two chars (before)"""
+    char = text[-1]
+    current = [row[0] + 1]
+    for j, other in enumerate(word, 1):
+        cost = min(row[j] + 1, current[j - 1] + 1, row[j - 1] + (char != other))
+        if before is not None and j > 1 and char == word[j - 2] and text[-2] == other:
+            cost = min(cost, before[j - 2] + 1)
+        current.append(cost)
+    return current
+
+
+def edit_distance(a: str, b: str) -> int:
+    "Inserts, deletes, substitutions and swaps of neighbour chars turning a into b"
+    before, row = None, list(range(len(a) + 1))
+    for end in range(1, len(b) + 1):
+        before, row = row, next_row(row, a, b[:end], before)
+    return row[-1]
+
+
+def typo_distance(name: str) -> int:
+    "Edit distance still taken for a typo: one for short names, two otherwise"
+    return 1 if len(name) < 5 else 2
+
+
+class NameIndex(SortedIndex):
+    "Names sorted case-insensitively for prefix completion and typo lookups"
+
+    def __init__(self):
+        super().__init__(name_key)
+
+    def complete(self, prefix: str, limit: int = None) -> list:
+        "Names starting with prefix in any case, at most limit of them"
+        prefix = prefix.lower()
+        names = []
+        for pos in range(bisect_left(self.keys, (prefix,)), len(self.keys)):
+            key, name = self.keys[pos]
+            if not key.startswith(prefix) or len(names) == limit:
+                break
+            names.append(name)
+        return names
+
+    def closest(self, word: str, k: int, limit: int = None) -> list:
+        """Names within edit distance k of word in any case, closest first.
+
+        The sorted names are walked as a trie with a row of edit distances
+        for every prefix, a Levenshtein automaton run over the name set:
+        prefixes more than k edits away from every prefix of word are skipped
+        with all the names under them. Children by a char missing from word
+        all get the same row, it is computed once and, when already too far,
+        only the children by chars of word are looked up.
+        """
+        word = word.lower()
+        chars = set(word)
+        found = []
+        stack = [("", list(range(len(word) + 1)), None, 0, len(self.keys))]
+        while stack:
+            prefix, row, before, lo, hi = stack.pop()
+            while lo < hi and self.keys[lo][0] == prefix:
+                if row[-1] <= k:
+                    found.append((row[-1], *self.keys[lo]))
+                lo += 1
+            if lo == hi:
+                continue
+            other = next_row(row, word, prefix + "\0", before)
+            far = min(other) > k
+            for child, start, end in self.__children(prefix, lo, hi, chars if far and hi - lo > len(chars) else None):
+                if child[-1] in chars:
+                    child_row = next_row(row, word, child, before)
+                elif far:
+                    continue
+                else:
+                    child_row = other
+                if min(child_row) <= k:
+                    stack.append((child, child_row, row, start, end))
+        return [name for _, _, name in sorted(found)][:limit]
+
+    def __children(self, prefix: str, lo: int, hi: int, chars: set = None):
+        "Prefixes one char longer than prefix in keys[lo:hi] with their ranges, only by chars when given"
+        if chars is None:
+            while lo < hi:
+                child = prefix + self.keys[lo][0][len(prefix)]
+                end = bisect_left(self.keys, (child + "\U0010ffff",), lo, hi)
+                yield child, lo, end
+                lo = end
+            return
+        for char in sorted(chars):
+            child = prefix + char
+            start = bisect_left(self.keys, (child,), lo, hi)
+            if start < hi and self.keys[start][0].startswith(child):
+                yield child, start, bisect_left(self.keys, (child + "\U0010ffff",), start, hi)
+
+
+TOKEN = re.compile(r"\w+")
+QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> list:
+    return TOKEN.findall(text.lower())
+
+
+class TextIndex:
+    """Inverted index of word positions over notes with BM25 ranking.
+
+    Query words must all occur in a note, `word*` matches any word with
+    that prefix and `"two words"` matches the words next to each other.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.postings = {}
+        self.words = []
+        self.docs = {}
+        self.total = 0
+
+    def add(self, doc: int, text: str):
+        self.discard(doc)
+        tokens = tokenize(text)
+        self.docs[doc] = tokens
+        self.total += len(tokens)
+        for pos, token in enumerate(tokens):
+            positions = self.postings.get(token)
+            if positions is None:
+                positions = self.postings[token] = {}
+                insort(self.words, token)
+            positions.setdefault(doc, []).append(pos)
+
+    def discard(self, doc: int):
+        tokens = self.docs.pop(doc, None)
+        if tokens is None:
+            return
+        self.total -= len(tokens)
+        for token in set(tokens):
+            positions = self.postings[token]
+            del positions[doc]
+            if not positions:
+                del self.postings[token]
+                del self.words[bisect_left(self.words, token)]
+
+    def search(self, query: str) -> list:
+        "Ids of notes matching every part of query, best first"
+        groups = []
+        phrases = []
+        for phrase, word in QUERY.findall(query):
+            tokens = tokenize(phrase or word)
+            if not tokens:
+                continue
+            if word.endswith("*") and len(tokens) == 1:
+                groups.append(self.__expand(tokens[0]))
+            else:
+                groups.extend([token] for token in tokens)
+                if len(tokens) > 1:
+                    phrases.append(tokens)
+        if not groups:
+            return []
+
+        candidates = None
+        for group in sorted(groups, key=self.__frequency):
+            docs = set()
+            for token in group:
+                docs.update(self.postings.get(token, ()))
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                return []
+        candidates = [doc for doc in candidates if all(self.__has_phrase(doc, tokens) for tokens in phrases)]
+
+        scores = {doc: sum(self.__score(doc, token) for group in groups for token in group) for doc in candidates}
+        return sorted(candidates, key=lambda doc: (-scores[doc], doc))
+
+    def __expand(self, prefix: str) -> list:
+        tokens = []
+        for pos in range(bisect_left(self.words, prefix), len(self.words)):
+            if not self.words[pos].startswith(prefix):
+                break
+            tokens.append(self.words[pos])
+        return tokens
+
+    def __frequency(self, group: list) -> int:
+        return sum(len(self.postings.get(token, ())) for token in group)
+
+    def __has_phrase(self, doc: int, tokens: list) -> bool:
+        starts = set(self.postings[tokens[0]][doc])
+        for shift, token in enumerate(tokens[1:], 1):
+            starts &= {pos - shift for pos in self.postings[token].get(doc, ())}
+            if not starts:
+                return False
+        return True
+
+    def __score(self, doc: int, token: str) -> float:
+        positions = self.postings.get(token, {})
+        if doc not in positions:
+            return 0.0
+        tf = len(positions[doc])
+        idf = math.log(1 + (len(self.docs) - len(positions) + 0.5) / (len(positions) + 0.5))
+        norm = 1 - self.b + self.b * len(self.docs[doc]) / (self.total / len(self.docs))
+        return idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+
+class TagIndex:
+    "Tag -> note ids postings answering boolean tag queries with set algebra"
+
+    def __init__(self):
+        self.postings = {}
+        self.tags_of = {}
+
+    def add(self, doc: int, tags):
+        tags = frozenset(tags)
+        old = self.tags_of.get(doc, frozenset())
+        if tags == old:
+            return
+        for tag in old - tags:
+            self.__unpost(tag, doc)
+        for tag in tags - old:
+            self.postings.setdefault(tag, set()).add(doc)
+        if tags:
+            self.tags_of[doc] = tags
+        else:
+            self.tags_of.pop(doc, None)
+
+    def discard(self, doc: int):
+        for tag in self.tags_of.pop(doc, ()):
+            self.__unpost(tag, doc)
+
+    def query(self, any_of=(), all_of=(), none_of=(), universe=()) -> set:
+        "Notes with any of any_of tags, all of all_of and none of none_of"
+        if any_of:
+            docs = set().union(*(self.postings.get(tag, ()) for tag in any_of))
+        elif all_of:
+            docs = None
+        else:
+            docs = set(universe)
+        for tag in sorted(all_of, key=lambda tag: len(self.postings.get(tag, ()))):
+            posting = self.postings.get(tag, set())
+            docs = set(posting) if docs is None else docs & posting
+        for tag in none_of:
+            docs -= self.postings.get(tag, set())
+        return docs
+
+    def counts(self) -> dict:
+        return {tag: len(docs) for tag, docs in self.postings.items()}
+
+    def __unpost(self, tag: str, doc: int):
+        docs = self.postings[tag]
+        docs.discard(doc)
+        if not docs:
+            del self.postings[tag]
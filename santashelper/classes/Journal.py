@@ -0,0 +1,265 @@
+import os
+import pickle
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks on Windows, sessions are not guarded there
+    fcntl = None
+
+from .AddressBook import *
+
+MAGIC = b"SANTAS-BOOK"
+
+
+class Journal:
+    """Book snapshot plus append-only log of changed records and notes.
+
+    Saving appends only the records changed since the last save, loading
+    replays the log on top of the snapshot. When the log grows over
+    `limit` bytes the book is compacted into a fresh snapshot.
+
+    Several sessions may share the files. Load and save hold an advisory
+    lock on `<path>.lock` only while reading or writing. Every save ends
+    with a ("gen", n, None) entry and the snapshot header keeps the
+    generation it was written at, so before writing a session first merges
+    what other sessions saved since it last looked. A record or note changed
+    by both sessions keeps the version saved first and is reported back.
+    The snapshot also keeps the generation each record and note was last
+    saved at, so this holds when another session compacted in between.
+    """
+
+    def __init__(self, path: Path, limit: int = 1 << 20):
+        self.path = Path(path)
+        self.log_path = self.path.with_name(self.path.name + ".log")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.limit = limit
+        self.generation = 0  # last generation read or written
+        self.snapshot = 0  # generation of the snapshot the book is based on
+        self.offset = 0  # bytes of the log already applied to the book
+        self.max_note = 0  # notes after this index are new in this session
+        self.versions = {}  # ("rec", name) or ("note", index) -> generation it was last saved at
+
+    def load(self) -> AddressBook:
+        "Read snapshot and replay the log"
+        with self.__locked(shared=True):
+            book = self.__read_snapshot()
+            for entry in self.__read_log(0):
+                self.__apply(book, entry)
+        book.changed.clear()
+        book.notes.changed.clear()
+        self.max_note = book.notes.max_index
+        return book
+
+    def save(self, book: AddressBook) -> list:
+        """Merge changes saved by other sessions, then append changed records
+        and notes to the log. Returns names of records and indexes of notes
+        whose changes were dropped because another session saved them first."""
+        if not book.changed and not book.notes.changed:
+            return []
+        with self.__locked():
+            conflicts = self.__sync(book)
+            entries = [("rec", name, book.data.get(name)) for name in book.changed]
+            entries += [("note", idx, book.notes.data.get(idx)) for idx in book.notes.changed]
+            if entries:
+                self.generation += 1
+                for kind, key, _ in entries:
+                    self.versions[(kind, key)] = self.generation
+                entries.append(("gen", self.generation, None))
+                with open(self.log_path, "ab") as fh:
+                    for entry in entries:
+                        pickle.dump(entry, fh)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                    self.offset = fh.tell()
+            book.changed.clear()
+            book.notes.changed.clear()
+            self.max_note = book.notes.max_index
+            if self.offset > self.limit:
+                self.__write_snapshot(book)
+        return conflicts
+
+    def compact(self, book: AddressBook) -> list:
+        "Write full snapshot and drop the log, returns conflicts as save does"
+        with self.__locked():
+            conflicts = self.__sync(book)
+            self.__write_snapshot(book)
+        self.max_note = book.notes.max_index
+        return conflicts
+
+    @contextmanager
+    def __locked(self, shared: bool = False):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def __snapshot_generation(self) -> int:
+        try:
+            with open(self.path, "rb") as fh:
+                return self.__read_header(fh)
+        except FileNotFoundError:
+            return 0
+
+    def __read_header(self, fh) -> int:
+        "Generation from the snapshot header, 0 for dumps written before headers"
+        start = fh.read(len(MAGIC))
+        if start != MAGIC:
+            fh.seek(0)
+            return 0
+        return int(fh.readline())
+
+    def __read_snapshot(self) -> AddressBook:
+        self.offset = 0
+        try:
+            with open(self.path, "rb") as fh:
+                self.snapshot = self.__read_header(fh)
+                book = pickle.load(fh)
+                try:
+                    self.versions = pickle.load(fh)
+                except EOFError:  # snapshot written before versions were kept
+                    self.versions = {}
+        except FileNotFoundError:
+            self.snapshot = 0
+            self.versions = {}
+            book = AddressBook()
+        self.generation = self.snapshot
+        return book
+
+    def __write_snapshot(self, book: AddressBook):
+        "Crash safe snapshot: temp file, fsync, rename, then the log is dropped"
+        self.generation += 1
+        for name in book.changed:
+            self.versions[("rec", name)] = self.generation
+        for idx in book.notes.changed:
+            self.versions[("note", idx)] = self.generation
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(MAGIC + b" %d\n" % self.generation)
+            pickle.dump(book, fh)
+            pickle.dump(self.versions, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+        self.log_path.unlink(missing_ok=True)
+        self.__fsync_dir()
+        self.snapshot = self.generation
+        self.offset = 0
+        book.changed.clear()
+        book.notes.changed.clear()
+
+    def __fsync_dir(self):
+        try:
+            fd = os.open(self.path.parent, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def __sync(self, book: AddressBook) -> list:
+        "Bring book up to date with the files, keeping its unsaved changes"
+        if self.__snapshot_generation() != self.snapshot:
+            return self.__reload(book)
+        conflicts, moved = [], []
+        for entry in self.__read_log(self.offset):
+            kind, key, _ = entry
+            if kind == "rec" and key in book.changed:
+                conflicts.append(key)
+            elif kind == "note" and key in book.notes.changed:
+                note = book.notes.data.get(key)
+                if key > self.max_note and note is not None:
+                    moved.append(note)  # both sessions added a note with this index
+                else:
+                    conflicts.append(f"note {key}")
+            self.__apply(book, entry)
+            if kind == "rec":
+                book.changed.discard(key)
+            elif kind == "note":
+                book.notes.changed.discard(key)
+        for note in moved:
+            book.notes.add(note)
+        return conflicts
+
+    def __reload(self, book: AddressBook) -> list:
+        """Another session wrote a new snapshot: read it and apply the unsaved
+        changes of book on top, except those saved by others since this
+        session last looked, which are returned as conflicts"""
+        seen = self.generation
+        fresh = self.__read_snapshot()
+        for entry in self.__read_log(0):
+            self.__apply(fresh, entry)
+        fresh.changed.clear()
+        fresh.notes.changed.clear()
+        conflicts = []
+        for name in book.changed:
+            if self.versions.get(("rec", name), 0) > seen:
+                conflicts.append(name)
+            else:
+                self.__apply(fresh, ("rec", name, book.data.get(name)))
+        for idx in sorted(book.notes.changed):
+            note = book.notes.data.get(idx)
+            if idx > self.max_note and note is not None:
+                fresh.notes.add(note)  # both sessions added a note with this index
+            elif self.versions.get(("note", idx), 0) > seen:
+                conflicts.append(f"note {idx}")
+            else:
+                fresh.notes.put(idx, note)
+        changed = fresh.changed
+        book.__setstate__(fresh.__getstate__())
+        book.changed = changed
+        return conflicts
+
+    def __read_log(self, start: int):
+        try:
+            fh = open(self.log_path, "r+b")
+        except FileNotFoundError:
+            return
+        with fh:
+            fh.seek(start)
+            good = start
+            saved = []
+            while True:
+                try:
+                    entry = pickle.load(fh)
+                except (EOFError, pickle.UnpicklingError):
+                    break
+                good = fh.tell()
+                if entry[0] == "gen":
+                    self.generation = max(self.generation, entry[1])
+                    for key in saved:
+                        self.versions[key] = entry[1]
+                    saved.clear()
+                else:
+                    saved.append(entry[:2])
+                yield entry
+            self.offset = good
+            # drop a torn tail left by a crash so new entries stay readable
+            fh.truncate(good)
+
+    def __apply(self, book: AddressBook, entry):
+        kind, key, value = entry
+        if kind == "rec":
+            if value is not None:
+                book.put_record(value)
+            elif key in book.data:
+                book.delete(key)
+        elif kind == "note":
+            book.notes.put(key, value)
+
+
+def migrate(path: Path) -> AddressBook:
+    "Rewrite dump and journal at path as one snapshot in the current record format"
+    journal = Journal(path)
+    book = journal.load()
+    journal.compact(book)
+    return book
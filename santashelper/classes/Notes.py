@@ -1,19 +1,44 @@
 from collections import UserDict, defaultdict
 from .Fields import *
+from .Indexes import TextIndex, TagIndex
+from .QueryCache import QueryCache
 
 class Notes(UserDict[int, Note]):
     def __init__(self):
         super().__init__()
         self.max_index = 0
+        self.changed = set()
+        self.build_indexes()
 
-    def __get_by_index(self, index: str) -> Note:
-        idx = self.__parse_index(index)
+    def build_indexes(self):
+        "Create full text and tag indexes and an empty query cache over current notes"
+        self.generation = 0
+        self.cache = QueryCache()
+        self.text_index = TextIndex()
+        self.tag_index = TagIndex()
+        for index, note in self.data.items():
+            self.text_index.add(index, str(note))
+            self.tag_index.add(index, note.tags)
+
+    def note_changed(self, index: int):
+        self.generation += 1
+        self.changed.add(index)
+        note = self.data.get(index)
+        if note is None:
+            self.text_index.discard(index)
+            self.tag_index.discard(index)
+        else:
+            self.text_index.add(index, str(note))
+            self.tag_index.add(index, note.tags)
+
+    def _get_by_index(self, index: str) -> Note:
+        idx = self._parse_index(index)
         if self.data.get(idx):
             return self.data.get(idx)
 
         raise KeyError(f"There is no note with an index {index}")
 
-    def __parse_index(self, index: str) -> int:
+    def _parse_index(self, index: str) -> int:
         try:
             index = int(index)
             if index > 0:
@@ -26,49 +51,71 @@ class Notes(UserDict[int, Note]):
     def add(self, note: Note):
         self.data[self.max_index + 1] = note
         self.max_index += 1
+        self.note_changed(self.max_index)
         return self.max_index
 
+    def put(self, index: int, note: Note):
+        "Store note under given index or drop it for None, used on journal replay"
+        if note is None:
+            self.data.pop(index, None)
+        else:
+            self.data[index] = note
+        self.max_index = max(self.max_index, index)
+        self.note_changed(index)
+
     def delete(self, index: str):
-        del self.data[self.__parse_index(index)]
+        idx = self._parse_index(index)
+        del self.data[idx]
+        self.note_changed(idx)
 
     def list(self, data: dict[int, Note] = None):
         data = self.data if data is None else data
         if len(data) > 0:
-            listed = ""
-            for index, note in data.items():
-                listed += f"{index} - {note.get_preview()}\n"
-            return listed
+            return "".join(f"{index} - {note.get_preview()}\n" for index, note in data.items())
         else:
             raise NotesNotFoundError("Unable to locate any notes.")  # TODO; make it better for search
 
-    def search(self, substr: str):
-        matched: dict[int, Note] = {}
-        for index, note in self.data.items():
-            if substr in str(note):
-                matched[index] = note
-
+    def search(self, query: str):
+        "List notes matching all words of query, most relevant first"
+        matched = {index: self.data[index] for index in self.text_index.search(query)}
         return self.list(matched)
 
     def show(self, index: str):
-        return str(self.__get_by_index(index))
+        return str(self._get_by_index(index))
 
     def change_note(self, index: str, new_text: str):
         if new_text == '':
             raise IncorrectFormatException("Note can't be empty")
-        self.data[self.__parse_index(index)] = Note(new_text)
+        idx = self._parse_index(index)
+        self.data[idx] = Note(new_text)
+        self.note_changed(idx)
         
     def add_tag(self, index: str, tag: str):
-        self.__get_by_index(index).tags.add(tag)
+        self._get_by_index(index).tags.add(tag)
+        self.note_changed(self._parse_index(index))
 
     def del_tag(self, index: str, tag: str):
-        self.__get_by_index(index).tags.discard(tag)
+        self._get_by_index(index).tags.discard(tag)
+        self.note_changed(self._parse_index(index))
 
-    def get_taged(self, tags: set):
-        if len(tags) == 0:
+    def get_taged(self, tags: set, required: set = frozenset(), excluded: set = frozenset()):
+        "List notes with any of tags, all of required and none of excluded tags"
+        if len(tags) + len(required) + len(excluded) == 0:
             raise ValueError("Empty tags")
-        matched: dict[int, Note] = {}
-        for index, note in self.data.items():
-            if len(tags & note.tags):
-                matched[index] = note
+        key = ("tags", frozenset(tags), frozenset(required), frozenset(excluded))
+        found = self.cache.get(
+            key, self.generation, lambda: sorted(self.tag_index.query(tags, required, excluded, self.data.keys()))
+        )
+        return self.list({index: self.data[index] for index in found})
 
-        return self.list(matched)
+    def tag_counts(self) -> dict:
+        "Dict of tag -> number of notes with it"
+        return self.tag_index.counts()
+
+    def __getstate__(self):
+        return {"data": self.data, "max_index": self.max_index}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.changed = set()
+        self.build_indexes()
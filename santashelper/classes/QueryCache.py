@@ -0,0 +1,41 @@
+from collections import OrderedDict
+
+
+class QueryCache:
+    """Bounded LRU of query results.
+
+    Every result is stored with the generation of the data it was computed
+    from. The owner bumps its generation on every change, so a lookup with
+    a newer generation drops the stale entry and computes the result again.
+    A cache of size 0 stores nothing.
+    """
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, generation, compute):
+        "Result of compute() for key, cached while generation stays the same"
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == generation:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = compute()
+        if self.size > 0:
+            self.entries[key] = (generation, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return f"{self.hits} hits, {self.misses} misses, {len(self.entries)}/{self.size} entries"
@@ -4,7 +4,11 @@ from collections import UserDict, defaultdict
 from .Fields import *
 
 class Record:
+    __slots__ = ("name", "phones", "birthday", "address", "email", "wishlist", "book", "__weakref__")
+    STATE = ("name", "phones", "birthday", "address", "email", "wishlist")
+
     def __init__(self, name):
+        self.book = None  # owner notified about changes, set by AddressBook.add_record
         self.name = Name(name)
         self.phones = []
         self.birthday = None
@@ -14,24 +18,35 @@ class Record:
 
     def add_birthday(self, date: str):
         self.birthday = Birthday(date)
+        self._changed()
 
     def remove_birthday(self):
         self.birthday = None
+        self._changed()
 
     def add_address(self, address: str):
         self.address = Address(address)
+        self._changed()
 
     def remove_address(self):
         self.address = None
+        self._changed()
 
     def add_email(self, email: str):
-        self.email = Email(email)
+        email = Email(email)
+        self._check_unique(email)
+        self.email = email
+        self._changed()
 
     def remove_email(self):
         self.email = None
+        self._changed()
 
     def add_phone(self, phone: str):
-        self.phones.append(Phone(phone))
+        phone = Phone(phone)
+        self._check_unique(phone)
+        self.phones.append(phone)
+        self._changed()
 
     def find_phone(self, phone: str, default=None):
         for itm in self.phones:
@@ -43,20 +58,28 @@ class Record:
         itm = self.find_phone(phone)
         if itm:
             self.phones.remove(itm)
+            self._changed()
 
     def edit_phone(self, old, new):
         phone = self.find_phone(old)
         if phone:
-            phone.value = new
+            new = Phone(new)
+            self._check_unique(new)
+            phone.value = new.value
+            self._changed()
 
     def change_phone(self, phone: str):
         if len(self.phones) > 0:
-            self.phones[0] = Phone(phone)
+            phone = Phone(phone)
+            self._check_unique(phone)
+            self.phones[0] = phone
+            self._changed()
         else:
             self.add_phone(phone)
 
     def add_wishlist_items(self, items):
         self.wishlist = [WishlistItem(item) for item in items]
+        self._changed()
 
     def show_wishlist(self):
         if not self.wishlist:
@@ -69,7 +92,27 @@ class Record:
         top_10_items = ['iPhone', 'Nike Air Force', 'Watch', 'Lego', 'Barbie doll', 'PS5', 'Drone', 
         'Disney Toy', 'Bike', 'Board Game']
         random.shuffle(top_10_items)
-        self.wishlist = [WishlistItem(top_10_items[0])]             
+        self.wishlist = [WishlistItem(top_10_items[0])]
+        self._changed()
+
+    def _check_unique(self, field: Field):
+        if self.book is not None:
+            self.book.check_unique(self, field)
+
+    def _changed(self):
+        if self.book is not None:
+            self.book.record_changed(self)
+
+    def __getstate__(self):
+        return {attr: getattr(self, attr) for attr in self.STATE}
+
+    def __setstate__(self, state):
+        # also the instance __dict__ of records pickled before __slots__
+        for attr in self.STATE:
+            setattr(self, attr, state.get(attr))
+        if self.wishlist is None:
+            self.wishlist = []
+        self.book = None
 
     def __str__(self):
         res = f"Contact name: {self.name}"
@@ -1,8 +1,18 @@
-import pickle, cmd
+import cmd
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
 from pathlib import Path
 
 from .HelpWorker import *
 from .AddressBook import *
+from .Journal import Journal
+from .SqliteBook import SqliteStorage
+from .Shards import ShardedStorage
+from .Stats import CommandStats
 
 class SantasHelper(cmd.Cmd):
     intro = ""
@@ -10,6 +20,20 @@ class SantasHelper(cmd.Cmd):
     doc_header = "My commands (type help <topic> for more info):"
 
     fn = "santas-book.dmp"
+    sqlite_fn = "santas-book.sqlite"
+    shards_fn = "santas-book.shards"
+    storage_kind = os.environ.get("ELF_STORAGE", "journal")  # journal, sqlite or shards
+    shard_count = int(os.environ.get("ELF_SHARDS", 32))  # children files of a new sharded book
+    journal_limit = 1 << 20  # log size in bytes that triggers compaction
+    completion_limit = 100  # max names offered on TAB
+    stats_file = os.environ.get("ELF_STATS")  # JSON file for command latencies written on exit
+    stats = CommandStats()
+    command_start = None
+    save_time = 0.0
+    page_size = 5  # children on a list_children page
+    page = None  # arguments of the last list_children page, for next and prev
+    save_every = 1  # changing commands between saves, 0 - save only on exit
+    unsaved = 0
     book = AddressBook()
     worker = HelpWorker()
 
@@ -21,10 +45,41 @@ class SantasHelper(cmd.Cmd):
 
     def do_exit(self, arg):
         "Stop work and good bye"
-        self.save_book()
+        self.flush_book()
         print("Goodbye! Have a jolly day!")
         return True
 
+    def do_compact(self, arg):
+        "Rewrite the book file in the current format"
+        self.report_conflicts(self.storage.compact(self.book))
+        print("Book compacted.")
+
+    def do_stats(self, arg):
+        "Show p50/p95/p99 latency of commands and query cache hits, 'stats reset' clears them"
+        if arg.strip() == "reset":
+            self.stats.clear()
+            self.book.cache.clear()
+            self.book.notes.cache.clear()
+            print("Stats cleared.")
+        else:
+            print(self.stats)
+            print(f"Query cache of children: {self.book.cache}")
+            print(f"Query cache of notes: {self.book.notes.cache}")
+
+    def do_profile(self, arg):
+        "Run a command under cProfile and show the slowest calls: profile <command> [args]"
+        words = arg.split()
+        if not words or words[0] == "profile":
+            print("Give me command to profile please.")
+            return
+        words[0] = words[0].lower()
+        profiler = cProfile.Profile()
+        stop = profiler.runcall(self.onecmd, " ".join(words))
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+        print(out.getvalue())
+        return stop
+
     def do_close(self, arg):
         "Stop work and good bye"
         return self.do_exit(arg)
@@ -39,6 +94,15 @@ class SantasHelper(cmd.Cmd):
         print(self.worker.add_contact(self.parse_input(arg), self.book))
         self.save_book()
 
+    def do_import(self, arg):
+        "Add children from CSV/JSONL file: import <file>"
+        print(self.worker.import_contacts(self.parse_input(arg), self.book))
+        self.save_book()
+
+    def do_export(self, arg):
+        "Write children to .csv/.jsonl/.vcf file: export <file> [search <text> | birthdays <days>]"
+        print(self.worker.export_contacts(self.parse_input(arg), self.book))
+
     def do_change(self, arg):
         "Change the contact phone"
         print(self.worker.change_contact(self.parse_input(arg), self.book))
@@ -64,13 +128,45 @@ class SantasHelper(cmd.Cmd):
         print(self.worker.show_contact(self.parse_input(arg), self.book))
 
     def do_list_children(self, arg):
-        "Print the list of children"
-        print(self.worker.print_all(self.book))
+        (
+            "Print a page of children: list_children [--sort=name|birthday|age|wishlist] [--desc] "
+            "[--offset=N] [--limit=N], next/prev turn pages"
+        )
+        args = self.parse_input(arg)
+        if not any(arg.startswith("--limit=") for arg in args):
+            args.append(f"--limit={self.page_size}")
+        self.show_page(args)
+
+    def do_next(self, arg):
+        "Print the next page of list_children"
+        self.turn_page(1)
+
+    def do_prev(self, arg):
+        "Print the previous page of list_children"
+        self.turn_page(-1)
+
+    def do_page_size(self, arg):
+        "Show or set number of children on a list_children page"
+        if arg.strip():
+            try:
+                size = int(arg)
+            except ValueError:
+                size = 0
+            if size < 1:
+                self.worker.last_error = "Page size must be a positive number"
+                print(self.worker.last_error)
+                return
+            self.page_size = size
+        print(f"Page size is {self.page_size}")
 
     def do_birthdays(self, arg):
         "Print birthday for next days"
         print(self.worker.get_birthdays_per_days(self.parse_input(arg), self.book))
 
+    def do_birthdays_in_month(self, arg):
+        "Print birthdays in the month given by number"
+        print(self.worker.get_birthdays_in_month(self.parse_input(arg), self.book))
+
     def do_add_birthday(self, arg):
         "Add/Change birthday for the contact"
         print(self.worker.add_birthday(self.parse_input(arg), self.book))
@@ -109,6 +205,14 @@ class SantasHelper(cmd.Cmd):
         "Search data in contacts"
         print(self.worker.search(self.parse_input(arg), self.book))
 
+    def do_find_by_phone(self, arg):
+        "Show child who owns the phone"
+        print(self.worker.find_by_phone(self.parse_input(arg), self.book))
+
+    def do_find_by_email(self, arg):
+        "Show child who owns the email"
+        print(self.worker.find_by_email(self.parse_input(arg), self.book))
+
     # ---- note commands ----
     def do_add_note(self, arg):
         "Adds a new note"
@@ -124,7 +228,7 @@ class SantasHelper(cmd.Cmd):
         print(self.worker.show_notes(self.parse_input(arg), self.book))
 
     def do_search_notes(self, arg):
-        "Searches for a note which contains a certain string"
+        'Searches notes containing all words, word* matches a prefix, "some words" a phrase'
         print(self.worker.search_notes(self.parse_input(arg), self.book))
 
     def do_delete_note(self, arg):
@@ -140,18 +244,25 @@ class SantasHelper(cmd.Cmd):
     def do_add_note_tag(self, arg):
         "Add a tag to the note by provided index"
         print(self.worker.add_tag(self.parse_input(arg), self.book))
+        self.save_book()
 
     def do_delete_note_tag(self, arg):
         "Delete a tag from the note by provided index"
         print(self.worker.del_tag(self.parse_input(arg), self.book))
+        self.save_book()
 
     def do_show_notes_with_tags(self, arg):
-        "Show notes that are taged by provided tags"
+        "Show notes with any of tags, +tag requires a tag, -tag excludes it"
         print(self.worker.get_taged_notes(self.parse_input(arg), self.book))
 
+    def do_show_tags(self, arg):
+        "Show tags with number of notes"
+        print(self.worker.show_tags(self.parse_input(arg), self.book))
+
     def do_add_wishlist_items(self, arg):
         "Add item(s) to wishlist"
         print(self.worker.add_wishlist_items(self.parse_input(arg), self.book))
+        self.save_book()
 
     def do_show_wishlist(self, arg):
         "Show child's wishlist"
@@ -159,7 +270,8 @@ class SantasHelper(cmd.Cmd):
 
     def do_generate_wishlist(self, arg):
         "Show child's wishlist"
-        print(self.worker.generate_wishlist(self.parse_input(arg), self.book))              
+        print(self.worker.generate_wishlist(self.parse_input(arg), self.book))
+        self.save_book()
 
     # ---- preprocessors ----
     def preloop(self):
@@ -172,8 +284,24 @@ class SantasHelper(cmd.Cmd):
         words = line.split()
         if len(words) > 0:
             words[0] = words[0].lower()
+        self.command_start = time.perf_counter()
+        self.save_time = 0.0
         return super().precmd(' '.join(words))
 
+    def postcmd(self, stop, line: str):
+        "Record wall time of the command"
+        words = line.split()
+        if self.command_start is not None and words and hasattr(self, "do_" + words[0]):
+            total = time.perf_counter() - self.command_start
+            self.stats.record(words[0], total - self.save_time, self.save_time)
+        self.command_start = None
+        return stop
+
+    def postloop(self):
+        "Write command latencies if ELF_STATS is set"
+        if self.stats_file:
+            self.stats.dump(Path(self.stats_file).expanduser())
+
     def completenames(self, text: str, *ignored) -> list[str]:
         "Lowering inputed command's chars"
         return super().completenames(text.lower(), *ignored)
@@ -184,14 +312,7 @@ class SantasHelper(cmd.Cmd):
         if len(line.split()) > 1:
             # second level not supported
             return []
-        part = line.lower()
-        if len(part) == 0:
-            return self.book.get_contact_names()
-        names = list()   
-        for name in self.book.get_contact_names():
-            if name.lower().startswith(part):
-                names.append(name)
-        return names
+        return self.book.complete_names(line, self.completion_limit)
     
     def complete_show(self, text, *ignored):
         return self.__auto_complete_contact_name(text)
@@ -225,17 +346,81 @@ class SantasHelper(cmd.Cmd):
     # ---- internal logic ----
     def open_address_book(self):
         "Loading the adress book from file if exists"
-        self.book = AddressBook()
-        try:
-            with open(Path.home() / self.fn, "rb") as file:
-                self.book = pickle.load(file)
-        except FileNotFoundError:
-            pass
+        if self.storage_kind == "sqlite":
+            self.storage = SqliteStorage(Path.home() / self.sqlite_fn)
+        elif self.storage_kind == "shards":
+            self.storage = ShardedStorage(Path.home() / self.shards_fn, self.shard_count, legacy=Path.home() / self.fn)
+        else:
+            self.storage = Journal(Path.home() / self.fn, self.journal_limit)
+        self.book = self.storage.load()
 
     def save_book(self):
-        "Dump AdressBook to file"
-        with open(Path.home() / self.fn, "wb") as fh:
-            pickle.dump(self.book, fh)
+        "Persist changes of AdressBook, every `save_every` call"
+        self.unsaved += 1
+        if self.save_every and self.unsaved >= self.save_every:
+            self.flush_book()
+
+    def flush_book(self):
+        "Persist changes of AdressBook now"
+        start = time.perf_counter()
+        conflicts = self.storage.save(self.book)
+        self.unsaved = 0
+        self.save_time += time.perf_counter() - start
+        self.report_conflicts(conflicts)
+
+    def report_conflicts(self, conflicts: list):
+        if conflicts:
+            print(f"Changes of {', '.join(map(str, conflicts))} were not saved: another elf session saved them first.")
+
+    def run_script(self, lines, save_every: int = 0) -> list:
+        """Batch mode: run command lines without prompts, saving the book every
+        save_every changing commands and at the end. Returns (line number,
+        message) pairs of failed lines, they are also printed to stderr."""
+        self.save_every = save_every
+        self.open_address_book()
+        errors = []
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            stop, error = self.run_line(line)
+            if error is not None:
+                errors.append((number, str(error)))
+                print(f"line {number}: {line}: {error}", file=sys.stderr)
+            if stop:
+                break
+        else:
+            self.flush_book()
+        self.postloop()
+        return errors
+
+    def show_page(self, args: list):
+        "Print the list_children page given by args and remember it"
+        print(self.worker.list_children(args, self.book))
+        self.page = args if self.worker.last_error is None else None
+
+    def turn_page(self, step: int):
+        if self.page is None:
+            self.worker.last_error = "Start with list_children please."
+            print(self.worker.last_error)
+            return
+        self.show_page(turn_page(self.page, step))
+
+    def run_line(self, line: str):
+        "Run one command line outside of cmdloop, returns stop flag and error or None"
+        line = self.precmd(line)
+        command = line.split()[0] if line.split() else ""
+        self.worker.last_error = None
+        if not hasattr(self, "do_" + command):
+            error = f"Unknown command {command}"
+            stop = False
+        else:
+            try:
+                stop = self.onecmd(line)
+                error = self.worker.last_error
+            except Exception as err:
+                error, stop = err, False
+        return self.postcmd(stop, line), error
 
     def parse_input(self, arg: str):
         "Parse input line as tuple"
@@ -0,0 +1,225 @@
+import asyncio
+import io
+import json
+import hmac
+import os
+import secrets
+import signal
+import socket
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from .SantasHelper import *
+
+# commands the thin client runs itself instead of sending them to the server
+LOCAL_COMMANDS = {"", "help", "?", "hello", "exit", "close"}
+# client commands that keep their state in the client: the list_children page
+PAGE_COMMANDS = {"list_children", "next", "prev", "page_size"}
+# served commands read and write files (import, export), so TCP stays on this machine
+LOOPBACK = {"127.0.0.1", "::1", "localhost"}
+
+
+def default_socket() -> Path:
+    return Path.home() / ".santas-book.sock"
+
+
+def default_token() -> Path:
+    return Path.home() / ".santas-book.token"
+
+
+def write_token(path: Path) -> str:
+    "New random token in a file only its owner can read"
+    token = secrets.token_hex(16)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)  # an older file may have been readable by others
+    with open(fd, "w", encoding="utf-8") as fh:
+        fh.write(token)
+    return token
+
+
+def split_address(address: str):
+    "host:port pair for TCP addresses, None for Unix socket paths"
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return host.strip("[]") or "127.0.0.1", int(port)
+    return None
+
+
+class BookServer:
+    """Serves the commands of one SantasHelper to many clients.
+
+    Requests and responses are JSON lines: {"line": "show Ann"} runs a
+    shell command and answers {"output": ..., "error": ...}, {"complete":
+    prefix} answers {"names": [...]}. The book is loaded once; commands run
+    one at a time on the event loop, so writes are serialized and every
+    client sees the changes of the others at once.
+
+    With a token the first request of a connection must be {"token": ...},
+    any other first request is refused and the connection closed.
+    """
+
+    def __init__(self, shell: SantasHelper, token: str = None):
+        self.shell = shell
+        self.token = token
+
+    def authorized(self, request) -> bool:
+        token = request.get("token") if isinstance(request, dict) else None
+        return isinstance(token, str) and hmac.compare_digest(token, self.token)
+
+    def dispatch(self, request: dict) -> dict:
+        if "complete" in request:
+            names = self.shell.book.complete_names(str(request["complete"]), request.get("limit"))
+            return {"names": names}
+        line = str(request.get("line", ""))
+        words = line.split()
+        if not words or words[0].lower() in LOCAL_COMMANDS:
+            return {"output": "", "error": f"Command {line} is not served"}
+        out = io.StringIO()
+        with redirect_stdout(out):
+            _, error = self.shell.run_line(line)
+        return {"output": out.getvalue(), "error": None if error is None else str(error)}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        authorized = self.token is None
+        try:
+            while data := await reader.readline():
+                try:
+                    request = json.loads(data)
+                except ValueError:
+                    request = None
+                if not authorized:
+                    authorized = self.authorized(request)
+                    response = {"output": "", "error": None if authorized else "Not authorized"}
+                elif isinstance(request, dict):
+                    response = self.dispatch(request)
+                else:
+                    response = {"output": "", "error": "Broken request"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+                if not authorized:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(shell: SantasHelper, address: str = None, ready=None):
+    """Serve the book of shell on Unix socket path or host:port until SIGINT
+    or SIGTERM, then save it; ready() is called once clients can connect.
+    TCP is served on loopback hosts only, to clients that read the token
+    the server writes to ~/.santas-book.token for its owner"""
+    address = address or str(default_socket())
+    tcp = split_address(address)
+    if tcp and tcp[0] not in LOOPBACK:
+        raise ValueError(f"Refusing to serve on {tcp[0]}, use one of {', '.join(sorted(LOOPBACK))}")
+    shell.open_address_book()
+    if tcp:
+        server = BookServer(shell, write_token(default_token()))
+        listener = await asyncio.start_server(server.handle, *tcp)
+    else:
+        server = BookServer(shell)
+        # the socket is created owner only, not chmod-ed after others could connect
+        umask = os.umask(0o177)
+        try:
+            listener = await asyncio.start_unix_server(server.handle, address)
+        finally:
+            os.umask(umask)
+        os.chmod(address, 0o600)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        async with listener:
+            if ready is not None:
+                ready()
+            await stop.wait()
+    finally:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
+        if tcp:
+            default_token().unlink(missing_ok=True)
+        else:
+            Path(address).unlink(missing_ok=True)
+        shell.flush_book()
+
+
+class RemoteClient:
+    "Blocking JSON lines connection to BookServer"
+
+    def __init__(self, address: str):
+        tcp = split_address(address)
+        if tcp:
+            token = default_token().read_text(encoding="utf-8")
+            self.sock = socket.create_connection(tcp)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address)
+        self.file = self.sock.makefile("rwb")
+        if tcp and self.request(token=token)["error"] is not None:
+            self.close()
+            raise ConnectionRefusedError("the server did not accept the token in " + str(default_token()))
+
+    def request(self, **payload) -> dict:
+        self.file.write(json.dumps(payload).encode() + b"\n")
+        self.file.flush()
+        data = self.file.readline()
+        if not data:
+            raise ConnectionError("Server closed the connection")
+        return json.loads(data)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+class RemoteBook:
+    "The part of AddressBook used by the shell itself: name completion"
+
+    def __init__(self, client: RemoteClient):
+        self.client = client
+
+    def complete_names(self, prefix: str, limit: int = None) -> list:
+        return self.client.request(complete=prefix, limit=limit)["names"]
+
+
+class RemoteHelper(SantasHelper):
+    "Thin client shell: commands are sent to `elf serve`, which keeps and saves the book"
+
+    address = None
+    client = None
+
+    def open_address_book(self):
+        "Connect to the server unless already connected"
+        if self.client is None:
+            self.client = RemoteClient(self.address or str(default_socket()))
+            self.book = RemoteBook(self.client)
+
+    def flush_book(self):
+        "The server saves the book"
+
+    def onecmd(self, line: str):
+        words = line.split()
+        if not words or words[0] in LOCAL_COMMANDS | PAGE_COMMANDS or not hasattr(self, "do_" + words[0]):
+            return super().onecmd(line)
+        return self.remote(line)
+
+    def remote(self, line: str) -> bool:
+        "Run command line on the server, returns True when the connection is lost"
+        try:
+            response = self.client.request(line=line)
+        except (ConnectionError, OSError) as err:
+            print(f"Connection to the server is lost: {err}")
+            return True
+        print(response["output"], end="")
+        self.worker.last_error = response["error"]
+        return False
+
+    def show_page(self, args: list):
+        self.remote("list_children " + " ".join(args))
+        self.page = args if self.worker.last_error is None else None
+
+    def postloop(self):
+        super().postloop()
+        self.client.close()
@@ -0,0 +1,300 @@
+import heapq
+import json
+import os
+import pickle
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks on Windows, sessions are not guarded there
+    fcntl = None
+
+from .AddressBook import *
+from .Journal import Journal
+
+FORMAT = 2
+
+
+def shard_of(name: str, count: int) -> int:
+    "Shard of a child name, stable across runs unlike hash()"
+    return zlib.crc32(name.encode()) % count
+
+
+class ShardedStorage:
+    """Book kept in a directory of shards: children split by name hash into
+    `count` files, all notes in one more file and a manifest.
+
+    A shard keeps (seq, version, record) triples, seq being the place of the
+    child in the book, so loading merges the shards back in the order
+    children were added. Saving rewrites only the shards of changed
+    children, and the notes shard when notes changed. Every shard is written
+    to a temporary file, synced and renamed, so a crash leaves each shard
+    either old or new. On load the files are read by a thread pool and
+    unpickled one by one, unpickling holds the GIL anyway.
+
+    Sessions sharing the directory are guarded as in Journal: load and save
+    hold an advisory lock on `<path>.lock` and every save bumps the
+    generation kept in the manifest. The version of a child or note is the
+    generation it was last saved at, deleted children keep theirs in their
+    shard. A session saving after another one first reloads the shards and
+    applies its unsaved changes on top, except changes to children and
+    notes saved by the other session meanwhile, which are returned as
+    conflicts the way Journal does.
+    """
+
+    def __init__(self, path: Path, count: int = 32, legacy: Path = None):
+        self.path = Path(path)
+        self.manifest_path = self.path / "manifest.json"
+        self.notes_path = self.path / "notes.dmp"
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.count = count
+        self.legacy = legacy  # journal book moved into shards on first load
+        self.members = [{} for _ in range(count)]  # shard -> name -> seq
+        self.deleted = [set() for _ in range(count)]  # shard -> names of deleted children
+        self.versions = {}  # child name -> generation it was last saved at
+        self.note_versions = {}  # note index -> generation it was last saved at
+        self.next_seq = 0
+        self.generation = 0  # generation of the manifest last read or written
+        self.max_note = 0  # notes after this index are new in this session
+
+    def load(self) -> AddressBook:
+        "Read all shards, or the legacy journal book the first time"
+        with self.__locked(shared=True):
+            book = self.__read_book()
+        if book is None:
+            with self.__locked():
+                book = self.__read_book()  # another session may have created it meanwhile
+                if book is None:
+                    book = self.__create()
+        self.max_note = book.notes.max_index
+        return book
+
+    def save(self, book: AddressBook) -> list:
+        """Rewrite the shards holding changed children or notes. Returns names
+        of children and indexes of notes whose changes were dropped because
+        another session saved them first."""
+        if not book.changed and not book.notes.changed:
+            return []
+        with self.__locked():
+            conflicts = self.__sync(book)
+            self.__bump(book)
+            dirty, added = set(), set()
+            for name in book.changed:
+                shard = shard_of(name, self.count)
+                if name not in book.data:
+                    self.members[shard].pop(name, None)
+                    self.deleted[shard].add(name)
+                elif name not in self.members[shard]:
+                    self.deleted[shard].discard(name)
+                    added.add(name)
+                dirty.add(shard)
+            for name in self.__in_book_order(book, added):
+                self.members[shard_of(name, self.count)][name] = self.next_seq
+                self.next_seq += 1
+            for shard in sorted(dirty):
+                self.__write_shard(book, shard)
+            if book.notes.changed:
+                self.__write_notes(book)
+            self.__write_manifest()
+        book.changed.clear()
+        book.notes.changed.clear()
+        self.max_note = book.notes.max_index
+        return conflicts
+
+    def compact(self, book: AddressBook) -> list:
+        "Write every shard and the manifest, returns conflicts as save does"
+        with self.__locked():
+            conflicts = self.__sync(book)
+            self.__write_all(book)
+        self.max_note = book.notes.max_index
+        return conflicts
+
+    def shard_path(self, shard: int) -> Path:
+        return self.path / f"children-{shard:03d}.dmp"
+
+    def __create(self) -> AddressBook:
+        book = AddressBook()
+        if self.legacy is not None:
+            log = self.legacy.with_name(self.legacy.name + ".log")
+            if self.legacy.exists() or log.exists():
+                book = Journal(self.legacy).load()
+        self.__write_all(book)
+        return book
+
+    def __manifest(self) -> dict:
+        "Contents of the manifest, empty when the book was not created yet"
+        try:
+            with open(self.manifest_path, encoding="utf-8") as fh:
+                manifest = json.load(fh)
+        except FileNotFoundError:
+            return {}
+        if manifest.get("format") not in (1, FORMAT):
+            raise ValueError(f"Unknown shard format {manifest.get('format')} in {self.path}")
+        return manifest
+
+    def __read_book(self):
+        "Book merged from the shards, None when there is no manifest yet"
+        manifest = self.__manifest()
+        if not manifest:
+            return None
+        self.count = manifest["shards"]
+        self.generation = manifest.get("generation", 0)
+        paths = [self.notes_path] + [self.shard_path(shard) for shard in range(self.count)]
+        with ThreadPoolExecutor(max_workers=min(8, len(paths))) as pool:
+            blobs = list(pool.map(self.__read, paths))
+        notes = pickle.loads(blobs[0]) if blobs[0] is not None else Notes()
+        if isinstance(notes, tuple):
+            notes, self.note_versions = notes
+        else:  # format 1 kept the notes alone
+            self.note_versions = {}
+        shards = [self.__unpack(pickle.loads(blob) if blob is not None else []) for blob in blobs[1:]]
+        self.members = [{str(rec.name): seq for seq, _, rec in children} for children, _ in shards]
+        self.deleted = [set(deleted) for _, deleted in shards]
+        self.versions = {}
+        for children, deleted in shards:
+            self.versions.update(deleted)
+            self.versions.update((str(rec.name), version) for _, version, rec in children if version)
+        self.next_seq = max((seq + 1 for children, _ in shards for seq, _, _ in children[-1:]), default=0)
+        book = AddressBook()
+        merged = heapq.merge(*(children for children, _ in shards), key=lambda item: item[0])
+        data = {str(rec.name): rec for _, _, rec in merged}
+        book.__setstate__({"data": data, "notes": notes})
+        return book
+
+    def __unpack(self, shard) -> tuple:
+        "Children triples and deleted names of a shard, format 1 kept (seq, record) pairs"
+        if isinstance(shard, dict):
+            return shard["children"], shard["deleted"]
+        return [(seq, 0, rec) for seq, rec in shard], {}
+
+    def __sync(self, book: AddressBook) -> list:
+        "Reload when another session saved since this one last looked"
+        if self.__manifest().get("generation", 0) == self.generation:
+            return []
+        return self.__reload(book)
+
+    def __reload(self, book: AddressBook) -> list:
+        """Read the shards again and apply the unsaved changes of book on top,
+        except those saved by others since this session last looked, which
+        are returned as conflicts"""
+        seen = self.generation
+        fresh = self.__read_book() or AddressBook()
+        conflicts = []
+        for name in book.changed:
+            rec = book.data.get(name)
+            if self.versions.get(name, 0) > seen:
+                conflicts.append(name)
+            elif rec is not None:
+                fresh.put_record(rec)
+            elif name in fresh.data:
+                fresh.delete(name)
+            else:
+                fresh.changed.add(name)  # added and deleted again, nothing to write
+        for idx in sorted(book.notes.changed):
+            note = book.notes.data.get(idx)
+            if idx > self.max_note and note is not None:
+                fresh.notes.add(note)  # both sessions added a note with this index
+            elif self.note_versions.get(idx, 0) > seen:
+                conflicts.append(f"note {idx}")
+            else:
+                fresh.notes.put(idx, note)
+        changed = fresh.changed
+        book.__setstate__(fresh.__getstate__())
+        book.changed = changed
+        return conflicts
+
+    def __bump(self, book: AddressBook):
+        "Start a new generation and give it to the changed children and notes"
+        self.generation += 1
+        for name in book.changed:
+            self.versions[name] = self.generation
+        for idx in book.notes.changed:
+            self.note_versions[idx] = self.generation
+
+    def __write_all(self, book: AddressBook):
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.__bump(book)
+        self.members = [{} for _ in range(self.count)]
+        for seq, name in enumerate(book.data):
+            shard = shard_of(name, self.count)
+            self.members[shard][name] = seq
+            self.deleted[shard].discard(name)
+        self.next_seq = len(book.data)
+        for shard in range(self.count):
+            self.__write_shard(book, shard)
+        self.__write_notes(book)
+        self.__write_manifest()
+        book.changed.clear()
+        book.notes.changed.clear()
+
+    def __write_notes(self, book: AddressBook):
+        self.__write(self.notes_path, (book.notes, self.note_versions))
+
+    def __write_manifest(self):
+        "Record the generation so other sessions notice this save"
+        tmp = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"format": FORMAT, "shards": self.count, "generation": self.generation}, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.manifest_path)
+        self.__fsync_dir()
+
+    @contextmanager
+    def __locked(self, shared: bool = False):
+        if fcntl is None:
+            yield
+            return
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def __in_book_order(self, book: AddressBook, added: set) -> list:
+        "Children added since the last save are the last ones of the book"
+        ordered = []
+        for name in reversed(book.data):
+            if len(ordered) == len(added):
+                break
+            if name in added:
+                ordered.append(name)
+        return ordered[::-1]
+
+    def __write_shard(self, book: AddressBook, shard: int):
+        children = [(seq, self.versions.get(name, 0), book.data[name]) for name, seq in self.members[shard].items()]
+        deleted = {name: self.versions[name] for name in self.deleted[shard]}
+        self.__write(self.shard_path(shard), {"children": children, "deleted": deleted})
+
+    def __write(self, path: Path, value):
+        "Crash safe write: temp file, fsync, rename"
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump(value, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+
+    def __fsync_dir(self):
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def __read(self, path: Path):
+        "Bytes of a shard file, None when it is missing"
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,424 @@
+import json
+import sqlite3
+import weakref
+from itertools import groupby
+from collections.abc import MutableMapping
+from pathlib import Path
+
+from .AddressBook import *
+from .Indexes import QUERY, tokenize
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS children (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    birthday INTEGER,
+    doy INTEGER,
+    email TEXT,
+    email_key TEXT,
+    address TEXT,
+    wishlist TEXT NOT NULL DEFAULT '[]',
+    info TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS children_name ON children (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS children_doy ON children (doy);
+CREATE INDEX IF NOT EXISTS children_birthday ON children (birthday);
+CREATE INDEX IF NOT EXISTS children_email ON children (email_key);
+CREATE TABLE IF NOT EXISTS phones (
+    name TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    phone TEXT NOT NULL,
+    PRIMARY KEY (name, pos)
+);
+CREATE INDEX IF NOT EXISTS phones_phone ON phones (phone);
+CREATE TABLE IF NOT EXISTS notes (
+    idx INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS note_tags (
+    idx INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (idx, tag)
+);
+CREATE INDEX IF NOT EXISTS note_tags_tag ON note_tags (tag);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5 (
+    body,
+    tokenize = "unicode61 remove_diacritics 0 tokenchars '_'"
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+CHILD_COLUMNS = """name, birthday, email, address, wishlist,
+    (SELECT group_concat(phone, ' ') FROM
+        (SELECT phone FROM phones p WHERE p.name = c.name ORDER BY pos))"""
+
+# ORDER BY of insertion order and of the SORT_KEYS, {d} is the direction
+# asked for and {r} the opposite one; children without birthday come last
+ORDERS = {
+    None: "id {d}",
+    "name": "name COLLATE NOCASE {d}, name {d}",
+    "birthday": "birthday IS NULL, birthday {d}, CASE WHEN birthday IS NULL THEN id END, name {d}",
+    "age": "birthday IS NULL, birthday {r}, CASE WHEN birthday IS NULL THEN id END, name {r}",
+    "wishlist": "json_array_length(wishlist) {d}, name {d}",
+}
+
+
+class ChildTable(MutableMapping):
+    "Name -> Record mapping over the children table, records are built on access"
+
+    def __init__(self, conn: sqlite3.Connection, book):
+        self.conn = conn
+        self.book = book
+        self.loaded = weakref.WeakValueDictionary()
+
+    def __build(self, row) -> Record:
+        name, birthday, email, address, wishlist, phones = row
+        rec = self.loaded.get(name)
+        if rec is not None:
+            return rec
+        rec = Record(name)
+        rec.phones = [Phone.restore(phone) for phone in phones.split()] if phones else []
+        if birthday is not None:
+            rec.birthday = Birthday.restore(dt.datetime.fromordinal(birthday))
+        if email is not None:
+            rec.email = Email.restore(email)
+        if address is not None:
+            rec.address = Address.restore(address)
+        rec.wishlist = [WishlistItem.restore(item) for item in json.loads(wishlist)]
+        rec.book = self.book
+        self.loaded[name] = rec
+        return rec
+
+    def select(self, where: str = "", params=(), limit: int = -1, offset: int = 0, order: str = "id"):
+        "Records matched by SQL condition in insertion order or the given ORDER BY"
+        cur = self.conn.execute(
+            f"SELECT {CHILD_COLUMNS} FROM children c {where} ORDER BY {order} LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        )
+        for row in cur:
+            yield self.__build(row)
+
+    def write(self, rec: Record):
+        name = str(rec.name)
+        birthday = dt.date.fromordinal(rec.birthday.ordinal) if rec.birthday is not None else None
+        self.conn.execute(
+            """INSERT INTO children (name, birthday, doy, email, email_key, address, wishlist, info)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                birthday = excluded.birthday, doy = excluded.doy, email = excluded.email,
+                email_key = excluded.email_key, address = excluded.address,
+                wishlist = excluded.wishlist, info = excluded.info""",
+            (
+                name,
+                birthday.toordinal() if birthday else None,
+                day_of_year(birthday) if birthday else None,
+                rec.email.value if rec.email is not None else None,
+                rec.email.value.lower() if rec.email is not None else None,
+                rec.address.value if rec.address is not None else None,
+                json.dumps([item.value for item in rec.wishlist]),
+                user_info(rec),
+            ),
+        )
+        self.conn.execute("DELETE FROM phones WHERE name = ?", (name,))
+        self.conn.executemany(
+            "INSERT INTO phones (name, pos, phone) VALUES (?, ?, ?)",
+            [(name, pos, phone.value) for pos, phone in enumerate(rec.phones)],
+        )
+        self.loaded[name] = rec
+
+    def __getitem__(self, name: str) -> Record:
+        for rec in self.select("WHERE name = ?", (name,)):
+            return rec
+        raise KeyError(name)
+
+    def __setitem__(self, name: str, rec: Record):
+        self.write(rec)
+
+    def __delitem__(self, name: str):
+        if self.conn.execute("DELETE FROM children WHERE name = ?", (name,)).rowcount == 0:
+            raise KeyError(name)
+        self.conn.execute("DELETE FROM phones WHERE name = ?", (name,))
+        self.loaded.pop(name, None)
+
+    def __contains__(self, name) -> bool:
+        return self.conn.execute("SELECT 1 FROM children WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        for (name,) in self.conn.execute("SELECT name FROM children ORDER BY id"):
+            yield name
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM children").fetchone()[0]
+
+    def values(self):
+        return self.select()
+
+
+class NoteTable(MutableMapping):
+    "Index -> Note mapping over the notes table"
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __build(self, idx: int, text: str) -> Note:
+        note = Note(text)
+        note.tags = {tag for (tag,) in self.conn.execute("SELECT tag FROM note_tags WHERE idx = ?", (idx,))}
+        return note
+
+    def select(self, where: str = "", params=()):
+        "Index and note pairs matched by SQL condition"
+        cur = self.conn.execute(f"SELECT idx, text FROM notes {where} ORDER BY idx", params)
+        for idx, text in cur.fetchall():
+            yield idx, self.__build(idx, text)
+
+    def __getitem__(self, idx: int) -> Note:
+        for _, note in self.select("WHERE idx = ?", (idx,)):
+            return note
+        raise KeyError(idx)
+
+    def __setitem__(self, idx: int, note: Note):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO notes (idx, text, body) VALUES (?, ?, ?)", (idx, note.value, str(note))
+        )
+        self.conn.execute("DELETE FROM notes_fts WHERE rowid = ?", (idx,))
+        self.conn.execute("INSERT INTO notes_fts (rowid, body) VALUES (?, ?)", (idx, str(note)))
+        self.conn.execute("DELETE FROM note_tags WHERE idx = ?", (idx,))
+        self.conn.executemany("INSERT INTO note_tags (idx, tag) VALUES (?, ?)", [(idx, tag) for tag in note.tags])
+
+    def __delitem__(self, idx: int):
+        if self.conn.execute("DELETE FROM notes WHERE idx = ?", (idx,)).rowcount == 0:
+            raise KeyError(idx)
+        self.conn.execute("DELETE FROM notes_fts WHERE rowid = ?", (idx,))
+        self.conn.execute("DELETE FROM note_tags WHERE idx = ?", (idx,))
+
+    def __contains__(self, idx) -> bool:
+        return self.conn.execute("SELECT 1 FROM notes WHERE idx = ?", (idx,)).fetchone() is not None
+
+    def __iter__(self):
+        for (idx,) in self.conn.execute("SELECT idx FROM notes ORDER BY idx").fetchall():
+            yield idx
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM notes").fetchone()[0]
+
+    def items(self):
+        return self.select()
+
+
+class SqliteNotes(Notes):
+    "Notes stored in sqlite tables"
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.data = NoteTable(conn)
+        self.changed = set()
+        self.generation = 0
+        self.cache = QueryCache(0)  # other sessions may change the database behind it
+        self.__index_old_notes()
+
+    def __index_old_notes(self):
+        "Fill the full text index of a database written before it existed"
+        indexed = self.conn.execute("SELECT count(*) FROM notes_fts").fetchone()[0]
+        if indexed != len(self.data):
+            self.conn.execute("DELETE FROM notes_fts")
+            self.conn.execute("INSERT INTO notes_fts (rowid, body) SELECT idx, body FROM notes")
+
+    def note_changed(self, index: int):
+        self.changed.add(index)
+
+    @property
+    def max_index(self) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'max_index'").fetchone()
+        return row[0] if row else 0
+
+    @max_index.setter
+    def max_index(self, value: int):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('max_index', ?)", (value,))
+
+    def search(self, query: str):
+        "Same query language and ranking as TextIndex, run by the fts5 index"
+        parts = []
+        for phrase, word in QUERY.findall(query):
+            tokens = tokenize(phrase or word)
+            if not tokens:
+                continue
+            if word.endswith("*") and len(tokens) == 1:
+                parts.append(f'"{tokens[0]}"*')
+            else:
+                parts.append('"' + " ".join(tokens) + '"')
+        if not parts:
+            return self.list({})
+        cur = self.conn.execute(
+            "SELECT rowid FROM notes_fts WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts), rowid", (" ".join(parts),)
+        )
+        return self.list({idx: self.data[idx] for (idx,) in cur.fetchall()})
+
+    def add_tag(self, index: str, tag: str):
+        note = self._get_by_index(index)
+        note.tags.add(tag)
+        self.data[self._parse_index(index)] = note
+
+    def del_tag(self, index: str, tag: str):
+        note = self._get_by_index(index)
+        note.tags.discard(tag)
+        self.data[self._parse_index(index)] = note
+
+    def get_taged(self, tags: set, required: set = frozenset(), excluded: set = frozenset()):
+        if len(tags) + len(required) + len(excluded) == 0:
+            raise ValueError("Empty tags")
+        where, params = [], []
+        if tags:
+            marks = ", ".join("?" * len(tags))
+            where.append(f"idx IN (SELECT idx FROM note_tags WHERE tag IN ({marks}))")
+            params += tags
+        for tag in required:
+            where.append("idx IN (SELECT idx FROM note_tags WHERE tag = ?)")
+            params.append(tag)
+        if excluded:
+            marks = ", ".join("?" * len(excluded))
+            where.append(f"idx NOT IN (SELECT idx FROM note_tags WHERE tag IN ({marks}))")
+            params += excluded
+        return self.list(dict(self.data.select("WHERE " + " AND ".join(where), tuple(params))))
+
+    def tag_counts(self) -> dict:
+        return dict(self.conn.execute("SELECT tag, count(*) FROM note_tags GROUP BY tag"))
+
+
+class SqliteBirthdays:
+    "BirthdayIndex interface over the day of year index of children"
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def between(self, first: int, last: int):
+        cur = self.conn.execute(
+            "SELECT doy, name FROM children WHERE doy BETWEEN ? AND ? ORDER BY doy, id", (first, last)
+        )
+        for doy, rows in groupby(cur, key=lambda row: row[0]):
+            yield doy, [name for _, name in rows]
+
+
+class SqliteBook(AddressBook):
+    """AddressBook kept in a sqlite database.
+
+    Records live in tables indexed by name, phone, email and birthday
+    day of year and become Record objects only when accessed. Every edit
+    is a row update, `commit` makes the pending updates durable.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+        self.conn.create_function("edit_distance", 2, edit_distance, deterministic=True)
+        self.data = ChildTable(self.conn, self)
+        self.notes = SqliteNotes(self.conn)
+        self.birthdays = SqliteBirthdays(self.conn)
+        self.changed = set()
+        self.generation = 0
+        self.cache = QueryCache(0)  # other sessions may change the database behind it
+
+    def put_record(self, rec: Record):
+        rec.book = self
+        self.data[str(rec.name)] = rec
+
+    def record_changed(self, rec: Record):
+        self.data.write(rec)
+
+    def add_records(self, records) -> list:
+        "Rows are inserted one by one, the database keeps its indexes"
+        rejected = []
+        for pos, rec in enumerate(records):
+            try:
+                self.add_record(rec)
+            except (KeyError, IncorrectFormatException) as err:
+                rejected.append((pos, err))
+        return rejected
+
+    def delete(self, name: str):
+        try:
+            del self.data[name]
+        except KeyError:
+            raise self.not_found(name)
+
+    def phone_owner(self, phone: str):
+        row = self.conn.execute("SELECT name FROM phones WHERE phone = ?", (phone,)).fetchone()
+        return row[0] if row else None
+
+    def email_owner(self, email: str):
+        row = self.conn.execute("SELECT name FROM children WHERE email_key = ?", (email.lower(),)).fetchone()
+        return row[0] if row else None
+
+    def iter_records(self, offset: int = 0, limit: int = None, sort: str = None, desc: bool = False):
+        order = ORDERS[sort].format(d="DESC" if desc else "ASC", r="ASC" if desc else "DESC")
+        return self.data.select(limit=-1 if limit is None else limit, offset=offset, order=order)
+
+    def in_book_order(self, names) -> list:
+        "Names joined through a temp table, any number of them fits"
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS picked (name TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM picked")
+        self.conn.executemany("INSERT OR IGNORE INTO picked (name) VALUES (?)", ((name,) for name in names))
+        cur = self.conn.execute("SELECT c.name FROM children c JOIN picked p ON p.name = c.name ORDER BY c.id")
+        ordered = [name for (name,) in cur]
+        self.conn.execute("DELETE FROM picked")
+        return ordered
+
+    def complete_names(self, prefix: str, limit: int = None):
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        cur = self.conn.execute(
+            "SELECT name FROM children WHERE name LIKE ? ESCAPE '\\' ORDER BY name COLLATE NOCASE LIMIT ?",
+            (pattern, -1 if limit is None else limit),
+        )
+        return [name for (name,) in cur]
+
+    def suggest_names(self, name: str, limit: int = 3) -> list:
+        "Scans the names close in length, only done when a name is not found"
+        k = typo_distance(name)
+        cur = self.conn.execute(
+            """SELECT name FROM (SELECT name, edit_distance(lower(name), ?) AS distance FROM children
+                WHERE abs(length(name) - ?) <= ?) WHERE distance <= ? ORDER BY distance, lower(name) LIMIT ?""",
+            (name.lower(), len(name), k, k, limit),
+        )
+        return [found for (found,) in cur]
+
+    def search(self, search_str: str):
+        found_contacts = list(self.data.select("WHERE instr(info, ?) > 0", (search_str.lower(),)))
+        if not found_contacts:
+            raise IncorrectFormatException("No contacts found")
+        return found_contacts
+
+    def commit(self):
+        self.conn.commit()
+        self.changed.clear()
+        self.notes.changed.clear()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __getstate__(self):
+        raise TypeError("SqliteBook is stored in its database, not pickled")
+
+
+class SqliteStorage:
+    "Storage interface of Journal for a book kept in sqlite"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> SqliteBook:
+        return SqliteBook(self.path)
+
+    def save(self, book: SqliteBook) -> list:
+        book.commit()
+        return []
+
+    def compact(self, book: SqliteBook) -> list:
+        "Commit and VACUUM, giving back the pages of deleted rows"
+        book.commit()
+        book.conn.execute("VACUUM")
+        return []
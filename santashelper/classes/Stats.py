@@ -0,0 +1,76 @@
+import json
+from collections import deque
+from pathlib import Path
+
+
+class Rolling:
+    "Last `size` samples with nearest-rank percentiles over them"
+
+    def __init__(self, size: int = 1000):
+        self.samples = deque(maxlen=size)
+
+    def add(self, value: float):
+        self.samples.append(value)
+
+    def percentiles(self, *ranks) -> list:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return [0.0 for _ in ranks]
+        return [ordered[min(len(ordered) - 1, max(0, -(-rank * len(ordered) // 100) - 1))] for rank in ranks]
+
+
+class CommandStats:
+    """Wall time of shell commands split into handler and save time.
+
+    Every command keeps its total count and rolling windows of the last
+    samples, percentiles are computed over these windows.
+    """
+
+    RANKS = (50, 95, 99)
+    PARTS = ("total", "handler", "save")
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.counts = {}
+        self.samples = {}
+
+    def record(self, command: str, handler: float, save: float = 0.0):
+        parts = self.samples.get(command)
+        if parts is None:
+            parts = self.samples[command] = {part: Rolling(self.window) for part in self.PARTS}
+            self.counts[command] = 0
+        self.counts[command] += 1
+        parts["total"].add(handler + save)
+        parts["handler"].add(handler)
+        parts["save"].add(save)
+
+    def clear(self):
+        self.counts.clear()
+        self.samples.clear()
+
+    def summary(self) -> dict:
+        "command -> count and p50/p95/p99 seconds of total, handler and save time"
+        result = {}
+        for command in sorted(self.samples):
+            result[command] = {"count": self.counts[command]}
+            for part, rolling in self.samples[command].items():
+                result[command][part] = dict(zip((f"p{rank}" for rank in self.RANKS), rolling.percentiles(*self.RANKS)))
+        return result
+
+    def __str__(self):
+        summary = self.summary()
+        if not summary:
+            return "No commands measured yet."
+        header = f"{'command':<24}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        lines = [header + f"{'handler p95':>13}{'save p95':>10}"]
+        for command, stats in summary.items():
+            total = stats["total"]
+            lines.append(
+                f"{command:<24}{stats['count']:>7}{total['p50'] * 1e3:>10.2f}{total['p95'] * 1e3:>10.2f}"
+                f"{total['p99'] * 1e3:>10.2f}{stats['handler']['p95'] * 1e3:>13.2f}{stats['save']['p95'] * 1e3:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: Path):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.summary(), fh, indent=2)
@@ -1,19 +1,101 @@
 from __future__ import division
-from asciimatics.effects import Print, Cycle, Stars
-from asciimatics.renderers import ColourImageFile, FigletText
-from asciimatics.scene import Scene
-from asciimatics.screen import Screen
-from asciimatics.exceptions import ResizeScreenError
 
+import hashlib
 import importlib.resources
+import json
+import os
 import sys
+from pathlib import Path
+
+# asciimatics is imported by the functions below, so `elf` started without
+# the animation doesn't pay for loading it
 
 # Set the GIF file path
 IMG = "../assets/santa.gif"
+# Bump when the format of cached frames changes
+FRAMES_VERSION = 2
+
+
+def cache_dir() -> Path:
+    "Directory for rendered frames, $XDG_CACHE_HOME/santashelper or ~/.cache/santashelper"
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "santashelper"
+
+
+def frames_path(screen, image: Path) -> Path:
+    "Cache file of image frames rendered for terminal size, unicode and colours of screen"
+    digest = hashlib.sha256(image.read_bytes()).hexdigest()[:16]
+    charset = "uni" if screen.unicode_aware else "ascii"
+    name = f"frames-v{FRAMES_VERSION}-{digest}-{screen.width}x{screen.height}-{charset}-{screen.colours}.json"
+    return cache_dir() / name
+
+
+def render_frames(screen, image: Path, height: int) -> list:
+    """Frames of image as text of height lines with ${colour,attr,background}
+    escapes understood by StaticRenderer, in the terminal palette of screen.
+    With unicode a char is a half block showing two pixels, one above the other."""
+    from PIL import Image, ImageSequence
+
+    uni = screen.unicode_aware
+    blank = "${0,2,0}." if uni else "${0} "
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(screen.palette)
+    frames = []
+    with Image.open(image) as gif:
+        for frame in ImageSequence.Iterator(gif):
+            rows = height * 2 if uni else height
+            frame = frame.resize((frame.width * height * 2 // frame.height, rows), Image.BICUBIC).convert("RGBA")
+            dither = Image.Dither.FLOYDSTEINBERG if uni else Image.Dither.NONE
+            colours = frame.convert("RGB").quantize(colors=256, palette=palette, dither=dither)
+            lines = []
+            for y in range(0, rows, 2 if uni else 1):
+                below = y + 1 if uni else y
+                line = ""
+                for x in range(frame.width):
+                    if frame.getpixel((x, y))[3] < 64 and frame.getpixel((x, below))[3] < 64:
+                        line += blank
+                    elif uni:
+                        line += "${%d,2,%d}\u2584" % (colours.getpixel((x, below)), colours.getpixel((x, y)))
+                    else:
+                        line += "${%d}#" % colours.getpixel((x, y))
+                # some terminals reset the background only after one more char
+                lines.append(line + blank if uni else line)
+            frames.append("\n".join(lines))
+    return frames
+
+
+def santa_renderer(screen, image: Path):
+    """Renderer of the santa GIF; the frames are rendered once per terminal
+    and cached on disk, so later starts replay them without touching the GIF"""
+    from asciimatics.renderers import StaticRenderer
+
+    path = frames_path(screen, image)
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return StaticRenderer(images=json.load(fh))
+    except (OSError, ValueError):
+        pass
+    frames = render_frames(screen, image, screen.height - 2)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(frames, fh)
+        os.replace(tmp, path)
+        # frames of other sizes are from an earlier terminal, keep one file only
+        for old in path.parent.glob("frames-*.json"):
+            if old != path:
+                old.unlink(missing_ok=True)
+    except OSError:
+        pass  # no cache this time, the animation still plays
+    return StaticRenderer(images=frames)
 
 
 # Define the demo function
 def animation(screen):
+    from asciimatics.effects import Print, Cycle, Stars
+    from asciimatics.renderers import FigletText
+    from asciimatics.scene import Scene
+
     # Create a list to store scenes
     scenes = []
 
@@ -22,11 +104,7 @@ def animation(screen):
     santa_effect = [
         Print(
             screen,
-            ColourImageFile(
-                screen, MODULE_PATH / IMG,
-                screen.height-2,
-                uni=screen.unicode_aware,
-                dither=screen.unicode_aware),
+            santa_renderer(screen, MODULE_PATH / IMG),
             0,
             speed=1
         )
@@ -52,8 +130,18 @@ def animation(screen):
     screen.play(scenes, stop_on_resize=True, repeat=False)
 
 
+def animation_wanted(no_animation: bool = False) -> bool:
+    "Animation is skipped by flag, ELF_NO_ANIMATION variable or when not run in a terminal"
+    if no_animation or os.environ.get("ELF_NO_ANIMATION"):
+        return False
+    return sys.stdin.isatty() and sys.stdout.isatty()
+
+
 # Main function
 def welcome_animation():
+    from asciimatics.screen import Screen
+    from asciimatics.exceptions import ResizeScreenError
+
     con = True
     while con:
         try:
@@ -1,10 +1,62 @@
+import argparse
+import asyncio
+import os
+import sys
+
 from .classes.SantasHelper import *
-from .classes.animation import welcome_animation
+from .classes.Server import RemoteHelper, serve
+from .classes.animation import animation_wanted, welcome_animation
 
-def main():
-    welcome_animation()
-    SantasHelper().cmdloop()
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="elf", description="Santa's helper elf")
+    parser.add_argument("--no-animation", action="store_true", help="start without the welcome animation")
+    parser.add_argument("--script", help="run commands from file ('-' for stdin) and exit")
+    parser.add_argument("--save-every", type=int, default=0, metavar="N",
+                        help="in script mode save the book every N changing commands, not only at the end")
+    parser.add_argument("--connect", nargs="?", const="", default=os.environ.get("ELF_SERVER"), metavar="ADDRESS",
+                        help="work with the book of `elf serve` at socket path or host:port")
+    commands = parser.add_subparsers(dest="command")
+    serve_parser = commands.add_parser("serve", help="keep the book in memory and serve it to `elf --connect`")
+    serve_parser.add_argument("address", nargs="?", help="socket path (~/.santas-book.sock) or host:port")
+    serve_parser.add_argument("--save-every", type=int, default=1, metavar="N",
+                              help="save the book every N changing commands and on stop")
+    args = parser.parse_args(argv)
 
-if __name__ == "__main__":
-    main()
+    if args.command == "serve":
+        shell = SantasHelper()
+        shell.save_every = args.save_every
+        try:
+            asyncio.run(serve(shell, args.address))
+        except ValueError as err:
+            print(f"elf: {err}", file=sys.stderr)
+            return 2
+        return 0
+    if args.connect is not None:
+        shell = RemoteHelper()
+        shell.address = args.connect or None
+        try:
+            shell.open_address_book()
+        except OSError as err:
+            print(f"elf: can't connect to the server: {err}", file=sys.stderr)
+            return 2
+    else:
+        shell = SantasHelper()
+    if args.script is not None:
+        return run_script(shell, args.script, args.save_every)
+    if animation_wanted(args.no_animation):
+        welcome_animation()
+    shell.cmdloop()
+    return 0
 
+def run_script(shell: SantasHelper, script: str, save_every: int = 0) -> int:
+    "Exit code: 0 - all commands done, 1 - some lines failed, 2 - script can't be read"
+    try:
+        lines = sys.stdin.readlines() if script == "-" else Path(script).read_text(encoding="utf-8").splitlines()
+    except OSError as err:
+        print(f"elf: can't read {script}: {err.strerror}", file=sys.stderr)
+        return 2
+    errors = shell.run_script(lines, save_every)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
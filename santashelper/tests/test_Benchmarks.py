@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+
+from santashelper.benchmarks.generator import child_phone, generate_book
+from santashelper.benchmarks.suite import SCENARIOS, Bench, compare, run_scenarios
+from santashelper.classes.HelpWorker import HelpWorker
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generator_is_deterministic(self):
+        first, second = generate_book(200, seed=3), generate_book(200, seed=3)
+        self.assertEqual(str(first), str(second))
+        self.assertEqual(first.notes.list(), second.notes.list())
+        self.assertEqual(len(first.notes.data), 20)
+        self.assertEqual(len({child_phone(i) for i in range(10_000)}), 10_000)
+
+    def test_scenarios_keep_book(self):
+        book = generate_book(1000)
+        before = str(book), book.notes.list()
+        with tempfile.TemporaryDirectory() as workdir:
+            results = run_scenarios(Bench(book, workdir), repeat=1, target=0)
+        self.assertEqual(list(results), list(SCENARIOS))
+        self.assertTrue(all(res["seconds"] > 0 and "peak_bytes" in res for res in results.values()))
+        self.assertEqual((str(book), book.notes.list()), before)
+
+    def test_worker_scenarios_succeed(self):
+        errors = []
+
+        class Worker(HelpWorker):
+            last_error = property(lambda self: None, lambda self, err: err is not None and errors.append(err))
+
+        with tempfile.TemporaryDirectory() as workdir:
+            bench = Bench(generate_book(1000), workdir)
+            bench.worker = Worker()
+            run_scenarios(bench, repeat=1, target=0, memory=False, only=["worker."])
+        self.assertEqual(errors, [])
+
+    def test_compare(self):
+        baseline = {"scenarios": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "c": {"seconds": 1.0}}}
+        current = {"scenarios": {"a": {"seconds": 1.1}, "b": {"seconds": 2.0}, "d": {"seconds": 1.0}}}
+        lines = compare(current, baseline, 1.25)
+        self.assertEqual(len(lines), 2)
+        self.assertFalse(lines[0].startswith("REGRESSION"))
+        self.assertTrue(lines[1].startswith("REGRESSION"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import datetime as dt
+import random
+import unittest
+from unittest import mock
+
+from santashelper.classes import BirthdayEngine
+
+
+class TestBirthdayEngine(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(5)
+        start = dt.date(2008, 1, 1).toordinal()
+        self.ordinals = [start + rnd.randint(0, 6000) for _ in range(500)]
+        self.ordinals += [dt.date(2012, 2, 29).toordinal(), dt.date(2016, 2, 29).toordinal()]
+
+    def test_pure_python(self):
+        with mock.patch.object(BirthdayEngine, "np", None):
+            today = dt.date(2027, 2, 26)  # Friday
+            found = dict(BirthdayEngine.upcoming([dt.date(2012, 2, 29).toordinal()], today, 7))
+            self.assertEqual(found, {0: dt.date(2027, 3, 1)})
+            self.assertEqual(BirthdayEngine.ages([dt.date(2012, 2, 29).toordinal()], today), [14])
+
+    @unittest.skipIf(BirthdayEngine.np is None, "numpy is not installed")
+    def test_numpy_matches_pure_python(self):
+        for today in (dt.date(2026, 10, 18), dt.date(2027, 2, 27), dt.date(2028, 2, 29), dt.date(2028, 12, 30)):
+            for delta in (1, 7, 60, 365):
+                vectorized = BirthdayEngine.upcoming(self.ordinals, today, delta)
+                with mock.patch.object(BirthdayEngine, "np", None):
+                    expected = BirthdayEngine.upcoming(self.ordinals, today, delta)
+                self.assertEqual(vectorized, expected)
+            ages = BirthdayEngine.ages(self.ordinals, today)
+            with mock.patch.object(BirthdayEngine, "np", None):
+                self.assertEqual(ages, BirthdayEngine.ages(self.ordinals, today))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import datetime as dt
+import tempfile
+import unittest
+from pathlib import Path
+
+from santashelper.classes.AddressBook import AddressBook
+from santashelper.classes.Exporter import export_file
+from santashelper.classes.Fields import IncorrectFormatException
+from santashelper.classes.HelpWorker import HelpWorker
+from santashelper.classes.Importer import import_file
+from santashelper.classes.Record import Record
+
+
+class TestExporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.book = AddressBook()
+        self.birthday = dt.date(dt.date.today().year - 5, 3, 1)
+        record = Record("John Doe")
+        record.add_phone("1234567890")
+        record.add_email("john@example.com")
+        record.add_address("Main St, 1")
+        record.add_birthday(self.birthday.strftime("%d.%m.%Y"))
+        record.add_wishlist_items(["Lego", "Bike"])
+        self.book.add_record(record)
+        self.book.add_record(Record("Jane Smith"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        for name in ("book.csv", "book.jsonl"):
+            path = self.dir / name
+            self.assertEqual(export_file(path, self.book.values()), 2)
+            book = AddressBook()
+            report = import_file(path, book)
+            self.assertEqual(report.errors, [])
+            self.assertEqual(str(book), str(self.book))
+            self.assertEqual(book.find("John Doe").show_wishlist(), "Lego, Bike")
+
+    def test_vcard(self):
+        path = self.dir / "book.vcf"
+        export_file(path, [self.book.find("John Doe")])
+        card = path.read_bytes().decode()
+        self.assertIn("FN:John Doe\r\n", card)
+        self.assertIn("ADR:;;Main St\\, 1;;;;\r\n", card)
+        self.assertIn(f"BDAY:{self.birthday.isoformat()}\r\n", card)
+        self.assertTrue(card.endswith("END:VCARD\r\n"))
+
+    def test_unknown_format(self):
+        with self.assertRaises(IncorrectFormatException):
+            export_file(self.dir / "book.txt", self.book.values())
+
+    def test_birthdays_window_validated(self):
+        worker = HelpWorker()
+        path = self.dir / "book.csv"
+        for days in ("0", "366"):
+            message = worker.export_contacts([str(path), "birthdays", days], self.book)
+            self.assertEqual(str(message), "Days must be a positive number not greater than 365")
+            self.assertIs(worker.last_error, message)
+        self.assertFalse(path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import datetime as dt
+import unittest
+
+from santashelper.classes.Fields import Address, Birthday, Email, Phone, parse_date
+
+
+class TestParseMany(unittest.TestCase):
+    def test_phones(self):
+        parsed, errors = Phone.parse_many(["1234567890", "123", "(123) 456-78-90"])
+        self.assertEqual(parsed, ["1234567890", None, "1234567890"])
+        self.assertEqual(errors, [(1, Phone.ERROR)])
+
+    def test_emails(self):
+        parsed, errors = Email.parse_many(["john@example.com", "john@", "JANE@EXAMPLE.ORG"])
+        self.assertEqual(parsed, ["john@example.com", None, "JANE@EXAMPLE.ORG"])
+        self.assertEqual(errors, [(1, Email.ERROR)])
+
+    def test_birthdays(self):
+        today = dt.date(2024, 6, 1)
+        parsed, errors = Birthday.parse_many(["1.1.2015", "13.13.2015", "02.06.2007", "01.06.2007"], today)
+        self.assertEqual(parsed[0], dt.datetime(2015, 1, 1))
+        self.assertEqual(parsed[2], dt.datetime(2007, 6, 2))
+        self.assertEqual(parsed[1::2], [None, None])
+        self.assertEqual(errors, [(1, Birthday.ERROR), (3, Birthday.OUTGROWN)])
+
+    def test_generic(self):
+        parsed, errors = Address.parse_many(["Main St", ""])
+        self.assertEqual(parsed, ["Main St", ""])
+        self.assertEqual(errors, [])
+
+    def test_parse_date(self):
+        self.assertEqual(parse_date("29.02.2016"), dt.datetime(2016, 2, 29))
+        for value in ("13.13.23233", "29.02.2015", "1.1.15", "01.01.2015 ", "1/1/2015"):
+            with self.assertRaises(ValueError):
+                parse_date(value)
+
+    def test_matches_single_parse(self):
+        values = ["1234567890", "12345", "123-456-7890x"]
+        parsed, errors = Phone.parse_many(values)
+        for pos, value in enumerate(values):
+            try:
+                self.assertEqual(Phone(value).value, parsed[pos])
+            except Exception as err:
+                self.assertIn((pos, str(err)), errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -99,6 +99,67 @@ class TestHelpWorkerDeleteContact(unittest.TestCase):
         except KeyError as e:
             self.assertEqual(str(e), expected_output)
 
+class TestDidYouMean(unittest.TestCase):
+    def setUp(self):
+        self.worker = HelpWorker()
+        self.book = AddressBook()
+        for name in ("Olivia", "Oliver", "Olive", "Sam"):
+            self.book.add_record(Record(name))
+
+    def test_show_suggests(self):
+        self.assertEqual(str(self.worker.show_contact(["Olivai"], self.book)),
+                         "'Contact with name Olivai not found, did you mean Olivia, Olive or Oliver?'")
+        self.assertEqual(str(self.worker.show_contact(["sma"], self.book)),
+                         "'Contact with name sma not found, did you mean Sam?'")
+        self.assertEqual(str(self.worker.show_contact(["Peter"], self.book)), "'Contact with name Peter not found'")
+
+    def test_other_commands_suggest(self):
+        self.assertIn("did you mean Sam?", str(self.worker.delete_contact(["Sm"], self.book)))
+        self.assertIn(
+            "did you mean Olive, Oliver or Olivia?", str(self.worker.add_email(["Olivr", "o@example.com"], self.book))
+        )
+
+
+class TestListChildren(unittest.TestCase):
+    def setUp(self):
+        self.worker = HelpWorker()
+        self.book = AddressBook()
+        for i in range(7):
+            self.book.add_record(Record(f"Child{i}"))
+
+    def test_pages(self):
+        page = self.worker.list_children(["--limit=3"], self.book).splitlines()
+        self.assertEqual(page, ["Contact name: Child0", "Contact name: Child1", "Contact name: Child2",
+                                "Children 1-3 of 7, type next for more"])
+        page = self.worker.list_children(["--offset=6", "--limit=3"], self.book).splitlines()
+        self.assertEqual(page, ["Contact name: Child6", "Children 7-7 of 7"])
+        self.assertEqual(
+            self.worker.list_children(["--offset=7"], self.book), "No more children, there are 7 in the book."
+        )
+        self.assertEqual(self.worker.list_children([], AddressBook()), "Address book is empty.")
+
+    def test_bad_options(self):
+        usage = "Use list_children [--sort=name|birthday|age|wishlist] [--desc] [--offset=N] [--limit=N] please."
+        for args in (["--limit=0"], ["--offset=-1"], ["--page=2"], ["5"], ["--sort=phone"], ["--desc=1"]):
+            self.assertEqual(self.worker.list_children(args, self.book), usage)
+            self.assertIsNotNone(self.worker.last_error)
+
+    def test_lazy(self):
+        self.book.iter_records = MagicMock(return_value=iter([self.book.data["Child3"]]))
+        self.assertIn("Children 4-4 of 7", self.worker.list_children(["--offset=3", "--limit=1"], self.book))
+        self.book.iter_records.assert_called_once_with(3, 1, None, False)
+
+    def test_sorted(self):
+        self.book.find("Child4").add_birthday("01.01.2015")
+        self.book.find("Child1").add_birthday("01.01.2018")
+        self.book.find("Child2").add_wishlist_items(["Lego", "Bike"])
+        page = self.worker.list_children(["--sort=age", "--limit=3"], self.book).splitlines()
+        self.assertEqual([line.split(",")[0] for line in page[:3]],
+                         ["Contact name: Child1", "Contact name: Child4", "Contact name: Child0"])
+        page = self.worker.list_children(["--sort=wishlist", "--desc", "--limit=1"], self.book).splitlines()
+        self.assertEqual(page, ["Contact name: Child2", "Children 1-1 of 7, type next for more"])
+
+
 class TestBirthdayValidation(unittest.TestCase):
     def setUp(self):
         self.worker = HelpWorker()
@@ -0,0 +1,86 @@
+import datetime as dt
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from santashelper.classes.AddressBook import AddressBook
+from santashelper.classes.HelpWorker import HelpWorker
+from santashelper.classes.Importer import import_file
+from santashelper.classes.Record import Record
+
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.book = AddressBook()
+        self.birthday = dt.date(dt.date.today().year - 5, 3, 1).strftime("%d.%m.%Y")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_csv(self):
+        path = self.dir / "children.csv"
+        path.write_text(
+            "name,phones,email,birthday,address,wishlist\n"
+            f"John Doe,1234567890;0987654321,john@example.com,{self.birthday},Main St,Lego;Bike\n"
+            "Jane Smith,123,,,,\n"
+            "Jack,,,,,\n"
+        )
+        report = import_file(path, self.book)
+        self.assertEqual(report.added, 2)
+        self.assertEqual(report.errors, [(3, "Phone must have 10 digits")])
+        rec = self.book.find("John Doe")
+        self.assertEqual(
+            str(rec),
+            f"Contact name: John Doe, phones: 1234567890; 0987654321, email: john@example.com, "
+            f"address: Main St, birthday: {self.birthday}",
+        )
+        self.assertEqual(rec.show_wishlist(), "Lego, Bike")
+        self.assertIs(self.book.find_by_phone("0987654321"), rec)
+
+    def test_jsonl(self):
+        path = self.dir / "children.jsonl"
+        rows = [{"name": f"Child {i}", "phones": [f"{i:010d}"], "birthday": self.birthday} for i in range(50)]
+        lines = [json.dumps(row) for row in rows] + ["{broken", json.dumps({"name": "Child 1"})]
+        path.write_text("\n".join(lines) + "\n")
+        report = import_file(path, self.book, batch_size=7)
+        self.assertEqual(report.added, 50)
+        self.assertEqual([line for line, _ in report.errors], [51, 52])
+        self.assertEqual(self.book.get_contact_names()[:3], ["Child 0", "Child 1", "Child 2"])
+
+    def test_bulk_keeps_indexes(self):
+        self.book.add_record(Record("Zed"))
+        self.book.find("Zed").add_phone("5555555555")
+        path = self.dir / "children.jsonl"
+        rows = [
+            {"name": "bob", "phone": "1111111111", "wishlist": ["Lego", "Bike"]},
+            {"name": "Ann", "phone": "5555555555"},
+            {"name": "Amy", "phone": "1111111111"},
+            {"name": "Cid", "email": "cid@example.com", "birthday": self.birthday},
+            {"name": "Zed"},
+        ]
+        path.write_text("\n".join(json.dumps(row) for row in rows) + "\n")
+        report = import_file(path, self.book, batch_size=2)
+        self.assertEqual(report.added, 2)
+        self.assertEqual([line for line, _ in report.errors], [2, 3, 5])
+        self.assertEqual(self.book.complete_names(""), ["bob", "Cid", "Zed"])
+        self.assertEqual([str(rec.name) for rec in self.book.iter_records(sort="wishlist", desc=True)],
+                         ["bob", "Zed", "Cid"])
+        self.assertEqual(self.book.find_by_email("cid@example.com").name, "Cid")
+        self.assertEqual(self.book.get_birthdays_in_month(3)[0][1], ["Cid"])
+
+    def test_errors_file_not_writable(self):
+        path = self.dir / "children.csv"
+        path.write_text("name,phones\nAnn,1234567890\nBob,123\n")
+        (self.dir / "children.csv.errors").mkdir()
+        worker = HelpWorker()
+        result = worker.import_contacts([str(path)], self.book)
+        self.assertTrue(result.startswith("Imported 1 children, rejected 1 rows, can't write"))
+        self.assertEqual(worker.last_error, result)
+        self.assertIn("Ann", self.book.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,259 @@
+import datetime as dt
+import random
+import unittest
+from unittest import mock
+
+from santashelper.classes.AddressBook import AddressBook, birthdays_report
+from santashelper.classes.Fields import IncorrectFormatException
+from santashelper.classes.Indexes import BirthdayIndex, SortedIndex, TrigramIndex, edit_distance, wishlist_key
+from santashelper.classes.Indexes import NameIndex
+from santashelper.classes.Record import Record
+
+
+class TestTrigramIndex(unittest.TestCase):
+    def setUp(self):
+        self.book = AddressBook()
+        for name in ("John Doe", "Alice Smith", "Bob Johnson"):
+            self.book.add_record(Record(name))
+
+    def names(self, query):
+        return [str(rec.name) for rec in self.book.search(query)]
+
+    def test_search_order(self):
+        self.assertEqual(self.names("john"), ["John Doe", "Bob Johnson"])
+
+    def test_short_query(self):
+        self.assertEqual(self.names("ob"), ["Bob Johnson"])
+
+    def test_follows_mutators(self):
+        self.book.find("Alice Smith").add_phone("1234567890")
+        self.assertEqual(self.names("4567"), ["Alice Smith"])
+        self.book.find("Alice Smith").edit_phone("1234567890", "0987654321")
+        self.assertEqual(self.names("7654"), ["Alice Smith"])
+        with self.assertRaises(IncorrectFormatException):
+            self.book.search("4567")
+
+    def test_add_many_matches_add(self):
+        self.book.find("Alice Smith").add_phone("1234567890")
+        records = list(self.book.values())
+        bulk = TrigramIndex()
+        bulk.add_many(records[:1])
+        bulk.add_many(records)
+        self.assertEqual((bulk.postings, bulk.texts, bulk.order),
+                         (self.book.trigrams.postings, self.book.trigrams.texts, self.book.trigrams.order))
+        birthdays = BirthdayIndex()
+        birthdays.add_many([sorted_book().find(name) for name in ("dan", "Ann", "cid", "Bo")])
+        self.assertEqual(birthdays.days, [1, 63])
+        self.assertEqual(birthdays.by_day, {1: {"cid": None}, 63: {"dan": None, "Bo": None}})
+
+    def test_follows_delete(self):
+        self.book.delete("John Doe")
+        self.assertEqual(self.names("john"), ["Bob Johnson"])
+        self.assertNotIn("John Doe", self.book.trigrams.texts)
+
+    def test_candidates_verified(self):
+        # every trigram of the query occurs, but not as one substring
+        self.book.add_record(Record("abcd bcde"))
+        with self.assertRaises(IncorrectFormatException):
+            self.book.search("abcde")
+
+
+class TestReverseLookup(unittest.TestCase):
+    def setUp(self):
+        self.book = AddressBook()
+        self.record = Record("John Doe")
+        self.record.add_phone("1234567890")
+        self.record.add_email("John@Example.com")
+        self.book.add_record(self.record)
+        self.book.add_record(Record("Jane Smith"))
+
+    def test_find_by_phone(self):
+        self.assertIs(self.book.find_by_phone("(123) 456-7890"), self.record)
+        self.record.edit_phone("1234567890", "0987654321")
+        self.assertIs(self.book.find_by_phone("0987654321"), self.record)
+        with self.assertRaises(KeyError):
+            self.book.find_by_phone("1234567890")
+
+    def test_find_by_email(self):
+        self.assertIs(self.book.find_by_email("john@example.com"), self.record)
+        self.record.remove_email()
+        with self.assertRaises(KeyError):
+            self.book.find_by_email("john@example.com")
+
+    def test_duplicates_rejected(self):
+        jane = self.book.find("Jane Smith")
+        with self.assertRaises(IncorrectFormatException):
+            jane.add_phone("1234567890")
+        with self.assertRaises(IncorrectFormatException):
+            jane.add_email("JOHN@example.com")
+        duplicate = Record("Jack Doe")
+        duplicate.add_phone("1234567890")
+        with self.assertRaises(IncorrectFormatException):
+            self.book.add_record(duplicate)
+        self.assertEqual(jane.phones, [])
+
+    def test_delete_frees_keys(self):
+        self.book.delete("John Doe")
+        self.book.find("Jane Smith").add_phone("1234567890")
+        self.assertEqual(str(self.book.find_by_phone("1234567890").name), "Jane Smith")
+
+
+class TestBirthdayIndex(unittest.TestCase):
+    def setUp(self):
+        self.book = AddressBook()
+        self.year = dt.date.today().year - 10
+        for name, day in (("Leap", "29.02.2016"), ("Winter", "28.02.2015"), ("Spring", "01.03.2015")):
+            record = Record(name)
+            record.add_birthday(day)
+            self.book.add_record(record)
+
+    def test_month(self):
+        self.assertEqual(
+            self.book.get_birthdays_in_month(2, 2027),
+            [(dt.date(2027, 2, 28), ["Winter", "Leap"])],
+        )
+        self.assertEqual(
+            self.book.get_birthdays_in_month(2, 2028),
+            [(dt.date(2028, 2, 28), ["Winter"]), (dt.date(2028, 2, 29), ["Leap"])],
+        )
+
+    def test_range_over_new_year(self):
+        self.book.find("Spring").add_birthday("31.12.2015")
+        days = self.book.get_birthdays_between(dt.date(2026, 12, 1), dt.date(2027, 2, 28))
+        self.assertEqual(days, [(dt.date(2026, 12, 31), ["Spring"]), (dt.date(2027, 2, 28), ["Winter", "Leap"])])
+
+    def test_follows_mutators(self):
+        self.book.find("Winter").remove_birthday()
+        self.book.delete("Leap")
+        self.assertEqual(self.book.get_birthdays_in_month(2, 2027), [])
+        self.assertEqual(self.book.birthdays.days, [61])
+
+    def test_upcoming(self):
+        day = dt.date.today() + dt.timedelta(days=3)
+        self.book.find("Spring").add_birthday(day.replace(year=self.year).strftime("%d.%m.%Y"))
+        self.assertIn("Spring", self.book.get_birthdays_per_days(7))
+        self.assertEqual(self.book.get_birthdays_per_days(1), "No upcoming birthdays for 1 days")
+
+    def test_weekend_moved_to_monday_in_book_order(self):
+        for name, day in (("Monday", "26.10.2015"), ("Saturday", "24.10.2015"), ("Sunday", "25.10.2015")):
+            record = Record(name)
+            record.add_birthday(day)
+            self.book.add_record(record)
+
+        class Today(dt.datetime):
+            @classmethod
+            def today(cls):
+                return cls(2026, 10, 22)
+
+        with mock.patch("santashelper.classes.AddressBook.dt.datetime", Today):
+            report = self.book.get_birthdays_per_days(7)
+            records = self.book.get_birthday_records(7)
+        self.assertEqual(report, "Monday    (26.10.2026): Monday, Saturday, Sunday")
+        self.assertEqual(report, birthdays_report(self.book.values(), 7, dt.date(2026, 10, 22)))
+        self.assertEqual([str(rec.name) for rec in records], ["Monday", "Saturday", "Sunday"])
+
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.book = AddressBook()
+        for name in ("bob", "Alice", "alex", "Bella", "Al"):
+            self.book.add_record(Record(name))
+
+    def test_complete(self):
+        self.assertEqual(self.book.complete_names("al"), ["Al", "alex", "Alice"])
+        self.assertEqual(self.book.complete_names("B"), ["Bella", "bob"])
+        self.assertEqual(self.book.complete_names("z"), [])
+
+    def test_limit(self):
+        self.assertEqual(self.book.complete_names("", 2), ["Al", "alex"])
+
+    def test_follows_delete(self):
+        self.book.delete("alex")
+        self.assertEqual(self.book.complete_names("ale"), [])
+        self.assertEqual(self.book.suggest_names("alx"), ["Al"])
+
+    def test_closest(self):
+        self.assertEqual(self.book.names.closest("ALICE", 0), ["Alice"])
+        self.assertEqual(self.book.names.closest("alx", 1), ["Al", "alex"])
+        self.assertEqual(self.book.names.closest("Alicia", 2), ["Alice"])
+        self.assertEqual(self.book.names.closest("bo", 2, 2), ["bob", "Al"])
+        self.assertEqual(self.book.names.closest("zzzz", 2), [])
+
+    def test_closest_matches_edit_distance(self):
+        rng = random.Random(0)
+        names = NameIndex()
+        words = {"".join(rng.choice("abcdé ") for _ in range(rng.randint(1, 7))).strip() or "a" for _ in range(2000)}
+        names.add_many(Record(word) for word in words)
+        for _ in range(100):
+            word, k = "".join(rng.choice("abcdef") for _ in range(rng.randint(1, 7))), rng.randint(0, 2)
+            expected = sorted((edit_distance(word, name.lower()), name.lower(), name) for name in words)
+            self.assertEqual(names.closest(word, k), [name for dist, _, name in expected if dist <= k])
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("kitten", "sitting"), 3)
+        self.assertEqual(edit_distance("", "abc"), 3)
+        self.assertEqual(edit_distance("flaw", "lawn"), 2)
+        self.assertEqual(edit_distance("olivia", "olivai"), 1)
+
+
+def sorted_book() -> AddressBook:
+    book = AddressBook()
+    for name, birthday, wishes in (("dan", "03.03.2015", 1), ("Ann", None, 0), ("cid", "01.01.2012", 3),
+                                   ("Bo", "03.03.2015", 2), ("eve", None, 2)):
+        rec = Record(name)
+        if birthday:
+            rec.add_birthday(birthday)
+        rec.add_wishlist_items(["toy"] * wishes)
+        book.add_record(rec)
+    return book
+
+
+def names(records) -> list:
+    return [str(rec.name) for rec in records]
+
+
+class TestSortedViews(unittest.TestCase):
+    def setUp(self):
+        self.book = sorted_book()
+
+    def test_orders(self):
+        self.assertEqual(names(self.book.iter_records(sort="name")), ["Ann", "Bo", "cid", "dan", "eve"])
+        self.assertEqual(names(self.book.iter_records(sort="birthday")), ["cid", "Bo", "dan", "Ann", "eve"])
+        self.assertEqual(names(self.book.iter_records(sort="age")), ["dan", "Bo", "cid", "Ann", "eve"])
+        self.assertEqual(names(self.book.iter_records(sort="wishlist", desc=True)), ["cid", "eve", "Bo", "dan", "Ann"])
+        self.assertEqual(names(self.book.iter_records(desc=True)), ["eve", "Bo", "cid", "Ann", "dan"])
+
+    def test_pages(self):
+        for sort in ("name", "birthday", "age", "wishlist"):
+            for desc in (False, True):
+                whole = names(self.book.iter_records(sort=sort, desc=desc))
+                for offset in range(6):
+                    self.assertEqual(names(self.book.iter_records(offset, 2, sort, desc)), whole[offset:offset + 2])
+
+    def test_rebuild_matches_incremental(self):
+        rebuilt = AddressBook()
+        rebuilt.data = dict(self.book.data)
+        rebuilt.build_indexes()
+        for attr in ("names", "by_birthday", "by_wishlist"):
+            incremental, bulk = getattr(self.book, attr), getattr(rebuilt, attr)
+            self.assertEqual(bulk.keys, incremental.keys)
+            self.assertEqual(bulk.entry_of, incremental.entry_of)
+            self.assertEqual(list(bulk.missing), list(incremental.missing))
+        index = SortedIndex(wishlist_key)
+        index.add_many(self.book.data.values())
+        self.book.find("Ann").add_wishlist_items(["a", "b", "c", "d"])
+        index.add_many([self.book.find("Ann"), self.book.find("Ann"), self.book.find("dan")])
+        self.assertEqual(index.keys, self.book.by_wishlist.keys)
+
+    def test_follows_changes(self):
+        self.book.find("Ann").add_birthday("01.01.2010")
+        self.book.find("cid").remove_birthday()
+        self.book.find("dan").add_wishlist_items(["a", "b", "c", "d"])
+        self.book.delete("Bo")
+        self.assertEqual(names(self.book.iter_records(sort="birthday")), ["Ann", "dan", "eve", "cid"])
+        self.assertEqual(names(self.book.iter_records(sort="wishlist", desc=True)), ["dan", "cid", "eve", "Ann"])
+        self.assertEqual(names(self.book.iter_records(sort="name")), ["Ann", "cid", "dan", "eve"])
+
+
+if __name__ == "__main__":
+    unittest.main()
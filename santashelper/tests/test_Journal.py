@@ -0,0 +1,193 @@
+import fcntl
+import pickle
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from santashelper.classes.AddressBook import AddressBook
+from santashelper.classes.Journal import Journal
+from santashelper.classes.Record import Record
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "book.dmp"
+        self.journal = Journal(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_missing(self):
+        book = self.journal.load()
+        self.assertEqual(len(book), 0)
+
+    def test_replay_changes(self):
+        book = self.journal.load()
+        book.add_record(Record("John Doe"))
+        book.add_record(Record("Jane Smith"))
+        self.journal.save(book)
+        book.find("John Doe").add_phone("1234567890")
+        book.delete("Jane Smith")
+        book.add_note("buy sleigh")
+        self.journal.save(book)
+
+        loaded = self.journal.load()
+        self.assertEqual(list(loaded.keys()), ["John Doe"])
+        self.assertEqual(loaded.find("John Doe").phones[0], "1234567890")
+        self.assertEqual(loaded.notes.show("1"), "buy sleigh")
+        self.assertFalse(self.path.exists())
+
+    def test_save_appends_only_changes(self):
+        book = self.journal.load()
+        for i in range(100):
+            book.add_record(Record(f"Child {i}"))
+        self.journal.save(book)
+        size = self.journal.log_path.stat().st_size
+        book.find("Child 5").add_email("child5@example.com")
+        self.journal.save(book)
+        grown = self.journal.log_path.stat().st_size - size
+        self.assertLess(grown, size / 10)
+
+    def test_compaction(self):
+        self.journal.limit = 0
+        book = self.journal.load()
+        book.add_record(Record("John Doe"))
+        self.journal.save(book)
+        self.assertTrue(self.path.exists())
+        self.assertFalse(self.journal.log_path.exists())
+        self.assertIn("John Doe", self.journal.load())
+
+    def test_old_dump_is_snapshot(self):
+        book = AddressBook()
+        book.add_record(Record("John Doe"))
+        with open(self.path, "wb") as fh:
+            pickle.dump(book, fh)
+        loaded = self.journal.load()
+        loaded.find("John Doe").add_phone("1234567890")
+        self.assertIn("John Doe", loaded.changed)
+
+    def test_torn_tail(self):
+        book = self.journal.load()
+        book.add_record(Record("John Doe"))
+        self.journal.save(book)
+        with open(self.journal.log_path, "ab") as fh:
+            fh.write(b"\x80\x04garbage")
+        self.assertIn("John Doe", self.journal.load())
+        book.add_record(Record("Jane Smith"))
+        self.journal.save(book)
+        self.assertEqual(len(self.journal.load()), 2)
+
+
+class TestSessions(unittest.TestCase):
+    "Two Journal objects on the same files act as two elf sessions"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "book.dmp"
+        book = AddressBook()
+        book.add_record(Record("John"))
+        Journal(self.path).compact(book)
+        self.first, self.second = Journal(self.path), Journal(self.path)
+        self.book1, self.book2 = self.first.load(), self.second.load()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_merge(self):
+        self.book1.add_record(Record("Ann"))
+        self.assertEqual(self.first.save(self.book1), [])
+        self.book2.add_record(Record("Bob"))
+        self.assertEqual(self.second.save(self.book2), [])
+        self.assertEqual(sorted(self.book2.data), ["Ann", "Bob", "John"])
+        self.assertEqual(self.book2.find("Ann").book, self.book2)
+        self.assertEqual(sorted(Journal(self.path).load().data), ["Ann", "Bob", "John"])
+
+    def test_conflict(self):
+        self.book1.find("John").add_phone("1234567890")
+        self.first.save(self.book1)
+        self.book2.find("John").add_email("john@example.com")
+        self.book2.add_record(Record("Bob"))
+        self.assertEqual(self.second.save(self.book2), ["John"])
+        self.assertEqual(str(self.book2.find("John")), "Contact name: John, phones: 1234567890")
+        loaded = Journal(self.path).load()
+        self.assertEqual(str(loaded.find("John")), "Contact name: John, phones: 1234567890")
+        self.assertIn("Bob", loaded.data)
+        self.assertEqual(loaded.find_by_phone("1234567890").name.value, "John")
+
+    def test_new_notes_renumbered(self):
+        self.book1.add_note("first session")
+        self.first.save(self.book1)
+        self.book2.add_note("second session")
+        self.assertEqual(self.second.save(self.book2), [])
+        loaded = Journal(self.path).load()
+        self.assertEqual(loaded.notes.show("1"), "first session")
+        self.assertEqual(loaded.notes.show("2"), "second session")
+        self.assertEqual(self.book2.notes.search("session"), loaded.notes.search("session"))
+
+    def test_other_session_compacted(self):
+        self.book1.add_record(Record("Ann"))
+        self.first.compact(self.book1)
+        self.book2.delete("John")
+        self.book2.add_note("second session")
+        self.second.save(self.book2)
+        self.assertEqual(sorted(self.book2.data), ["Ann"])
+        self.assertEqual(sorted(Journal(self.path).load().data), ["Ann"])
+        self.assertEqual(self.book2.search("ann")[0].name.value, "Ann")
+
+    def test_conflict_after_compaction(self):
+        self.book1.add_note("first session")
+        self.first.save(self.book1)
+        self.book2 = self.second.load()
+        self.book1.find("John").add_phone("1234567890")
+        self.book1.notes.change_note("1", "changed by first")
+        self.first.save(self.book1)
+        self.first.compact(self.book1)
+        self.book2.find("John").add_email("john@example.com")
+        self.book2.notes.change_note("1", "changed by second")
+        self.book2.add_record(Record("Bob"))
+        self.assertEqual(sorted(self.second.save(self.book2)), ["John", "note 1"])
+        loaded = Journal(self.path).load()
+        self.assertEqual(str(loaded.find("John")), "Contact name: John, phones: 1234567890")
+        self.assertEqual(loaded.notes.show("1"), "changed by first")
+        self.assertIn("Bob", loaded.data)
+
+    def test_conflict_after_automatic_compaction(self):
+        first = Journal(self.path, limit=0)
+        book1 = first.load()
+        book1.find("John").add_phone("1234567890")
+        first.save(book1)
+        self.assertFalse(first.log_path.exists())
+        self.book2.find("John").add_email("john@example.com")
+        self.assertEqual(self.second.save(self.book2), ["John"])
+        self.assertEqual(str(Journal(self.path).load().find("John")), "Contact name: John, phones: 1234567890")
+
+    def test_generation(self):
+        self.book1.add_record(Record("Ann"))
+        self.first.save(self.book1)
+        self.book2.add_record(Record("Bob"))
+        self.second.save(self.book2)
+        self.assertEqual(self.second.generation, self.first.generation + 1)
+        self.second.compact(self.book2)
+        with open(self.path, "rb") as fh:
+            self.assertEqual(fh.readline(), b"SANTAS-BOOK %d\n" % self.second.generation)
+        self.assertFalse(self.path.with_name("book.dmp.tmp").exists())
+
+    def test_save_waits_for_lock(self):
+        self.book1.add_record(Record("Ann"))
+        saved = threading.Event()
+        with open(self.first.lock_path, "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            thread = threading.Thread(target=lambda: (self.first.save(self.book1), saved.set()))
+            thread.start()
+            time.sleep(0.1)
+            self.assertFalse(saved.is_set())
+            fcntl.flock(fh, fcntl.LOCK_UN)
+        thread.join(5)
+        self.assertTrue(saved.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
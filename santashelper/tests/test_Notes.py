@@ -0,0 +1,83 @@
+import unittest
+
+from santashelper.classes.Fields import Note, NotesNotFoundError
+from santashelper.classes.Notes import Notes
+
+
+class TestNotesSearch(unittest.TestCase):
+    def setUp(self):
+        self.notes = Notes()
+        self.notes.add(Note("Buy reindeer food for the long winter"))
+        self.notes.add(Note("Reindeer Rudolph: red nose, reindeer hungry"))
+        self.notes.add(Note("Wrap the presents for Rudolph"))
+
+    def indexes(self, query):
+        return [int(line.split(" - ")[0]) for line in self.notes.search(query).splitlines()]
+
+    def test_case_insensitive_ranked(self):
+        self.assertEqual(self.indexes("REINDEER"), [2, 1])
+
+    def test_all_words(self):
+        self.assertEqual(self.indexes("rudolph presents"), [3])
+
+    def test_prefix(self):
+        self.assertEqual(self.indexes("hung*"), [2])
+        self.assertEqual(self.indexes("rein* food"), [1])
+
+    def test_phrase(self):
+        self.assertEqual(self.indexes('"red nose"'), [2])
+        with self.assertRaises(NotesNotFoundError):
+            self.notes.search('"nose red"')
+
+    def test_tags(self):
+        self.notes.add_tag("3", "urgent")
+        self.assertEqual(self.indexes("urgent"), [3])
+        self.notes.del_tag("3", "urgent")
+        with self.assertRaises(NotesNotFoundError):
+            self.notes.search("urgent")
+
+    def test_follows_changes(self):
+        self.notes.change_note("1", "Buy carrots")
+        self.notes.delete("3")
+        self.assertEqual(self.indexes("buy"), [1])
+        self.assertEqual(self.indexes("carrots"), [1])
+        self.assertEqual(self.indexes("rudolph"), [2])
+
+
+class TestNotesTags(unittest.TestCase):
+    def setUp(self):
+        self.notes = Notes()
+        for tags in (("gift", "urgent"), ("gift",), ("urgent",), ()):
+            index = self.notes.add(Note(f"note {len(self.notes) + 1}"))
+            for tag in tags:
+                self.notes.add_tag(str(index), tag)
+
+    def indexes(self, *args, **kwargs):
+        return [int(line.split(" - ")[0]) for line in self.notes.get_taged(*args, **kwargs).splitlines()]
+
+    def test_any_of(self):
+        self.assertEqual(self.indexes({"gift", "urgent"}), [1, 2, 3])
+
+    def test_all_of(self):
+        self.assertEqual(self.indexes(set(), {"gift", "urgent"}), [1])
+
+    def test_exclude(self):
+        self.assertEqual(self.indexes({"gift"}, excluded={"urgent"}), [2])
+        self.assertEqual(self.indexes(set(), excluded={"gift"}), [3, 4])
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            self.notes.get_taged(set())
+        with self.assertRaises(NotesNotFoundError):
+            self.notes.get_taged({"missing"})
+
+    def test_counts_follow_changes(self):
+        self.assertEqual(self.notes.tag_counts(), {"gift": 2, "urgent": 2})
+        self.notes.del_tag("1", "gift")
+        self.notes.delete("3")
+        self.notes.change_note("2", "new text")
+        self.assertEqual(self.notes.tag_counts(), {"urgent": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
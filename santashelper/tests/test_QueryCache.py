@@ -0,0 +1,80 @@
+import datetime as dt
+import unittest
+from unittest import mock
+
+from santashelper.classes.AddressBook import AddressBook
+from santashelper.classes.QueryCache import QueryCache
+from santashelper.classes.Record import Record
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_generation(self):
+        cache = QueryCache()
+        compute = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(cache.get("q", 0, compute), 1)
+        self.assertEqual(cache.get("q", 0, compute), 1)
+        self.assertEqual(cache.get("q", 1, compute), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_lru(self):
+        cache = QueryCache(2)
+        cache.get("a", 0, lambda: "a")
+        cache.get("b", 0, lambda: "b")
+        cache.get("a", 0, lambda: "A")
+        cache.get("c", 0, lambda: "c")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(str(cache), "1 hits, 3 misses, 2/2 entries")
+
+    def test_disabled(self):
+        cache = QueryCache(0)
+        self.assertEqual([cache.get("q", 0, lambda: 5) for _ in range(2)], [5, 5])
+        self.assertEqual((cache.hits, cache.misses, len(cache.entries)), (0, 2, 0))
+
+
+class TestBookCache(unittest.TestCase):
+    def setUp(self):
+        self.book = AddressBook()
+        rec = Record("Alice")
+        rec.add_birthday("20.10.2015")
+        self.book.add_record(rec)
+        self.book.add_record(Record("Alina"))
+
+    def test_search_invalidated_by_change(self):
+        self.assertEqual(len(self.book.search("ali")), 2)
+        self.assertEqual(len(self.book.search("ALI")), 2)
+        self.assertEqual(self.book.cache.hits, 1)
+        self.book.delete("Alina")
+        self.assertEqual([str(rec.name) for rec in self.book.search("ali")], ["Alice"])
+        self.book.find("Alice").add_address("Main Street")
+        self.assertEqual(len(self.book.search("main")), 1)
+
+    def test_birthdays_invalidated_at_midnight(self):
+        class Today(dt.datetime):
+            now = dt.datetime(2026, 10, 18, 23, 59)
+
+            @classmethod
+            def today(cls):
+                return cls.now
+
+        with mock.patch("santashelper.classes.AddressBook.dt.datetime", Today):
+            self.assertIn("Alice", self.book.get_birthdays_per_days(3))
+            self.assertIn("Alice", self.book.get_birthdays_per_days(3))
+            self.assertEqual(self.book.cache.hits, 1)
+            Today.now = dt.datetime(2026, 10, 21, 0, 1)
+            self.assertEqual(self.book.get_birthdays_per_days(3), "No upcoming birthdays for 3 days")
+
+    def test_tags_invalidated_by_change(self):
+        notes = self.book.notes
+        first = self.book.add_note("milk and cookies")
+        notes.add_tag(str(first), "food")
+        self.assertEqual(notes.get_taged({"food"}), f"{first} - milk and cookies; tags: food\n")
+        second = self.book.add_note("carrots")
+        notes.add_tag(str(second), "food")
+        self.assertIn("carrots", notes.get_taged({"food"}))
+        self.assertEqual(notes.cache.hits, 0)
+        notes.get_taged({"food"})
+        self.assertEqual(notes.cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 import unittest
 import random
+import pickle
+from datetime import datetime
 
 from santashelper.classes.Record import Record
-from santashelper.classes.Fields import IncorrectFormatException, NotFoundError
+from santashelper.classes.Fields import IncorrectFormatException, NotFoundError, Birthday, Phone
 
 
 class TestRecord(unittest.TestCase):
@@ -109,4 +111,33 @@ class TestRecord(unittest.TestCase):
         items = ['iPhone', 'Nike Air Force', 'Watch']
         self.record.add_wishlist_items(items)
         with self.assertRaises(IncorrectFormatException):
-            self.record.generate_wishlist("John Doe")    
\ No newline at end of file
+            self.record.generate_wishlist("John Doe")
+
+    def test_slots(self):
+        self.record.add_birthday("01.01.2014")
+        self.assertFalse(hasattr(self.record, "__dict__"))
+        self.assertFalse(hasattr(self.record.birthday, "__dict__"))
+        self.assertEqual(self.record.birthday.ordinal, datetime(2014, 1, 1).toordinal())
+        # the ordinal is the only storage of a birthday, no unused value slot
+        self.assertEqual([cls.__slots__ for cls in type(self.record.birthday).__mro__[:-1]], [("ordinal",), ()])
+
+    def test_pickle_round_trip(self):
+        self.record.add_phone("1234567890")
+        self.record.add_birthday("01.01.2014")
+        self.record.add_wishlist_items(["Lego"])
+        self.record.book = object()
+        loaded = pickle.loads(pickle.dumps(self.record))
+        self.assertEqual(str(loaded), str(self.record))
+        self.assertEqual(loaded.show_wishlist(), "Lego")
+        self.assertIsNone(loaded.book)
+
+    def test_state_pickled_before_slots(self):
+        birthday = Birthday.__new__(Birthday)
+        birthday.__setstate__({"_Field__value": datetime(2014, 1, 1)})
+        phone = Phone.__new__(Phone)
+        phone.__setstate__({"_Field__value": "1234567890"})
+        record = Record.__new__(Record)
+        record.__setstate__({"name": self.record.name, "phones": [phone], "birthday": birthday,
+                             "address": None, "email": None})
+        self.assertEqual(str(record), "Contact name: John Doe, phones: 1234567890, birthday: 01.01.2014")
+        self.assertEqual(record.wishlist, [])
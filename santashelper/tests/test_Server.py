@@ -0,0 +1,142 @@
+import asyncio
+import io
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from santashelper.classes.Journal import Journal
+from santashelper import elf
+from santashelper.classes.Server import RemoteClient, RemoteHelper, serve, split_address
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.home = Path(self.tmp.name)
+        self.socket = str(self.home / "elf.sock")
+        env = dict(os.environ, HOME=str(self.home), ELF_STORAGE="journal")
+        self.server = subprocess.Popen([sys.executable, "-m", "santashelper.elf", "serve", self.socket], env=env)
+        for _ in range(100):
+            if os.path.exists(self.socket):
+                break
+            time.sleep(0.05)
+
+    def tearDown(self):
+        if self.server.poll() is None:
+            self.server.kill()
+            self.server.wait()
+        self.tmp.cleanup()
+
+    def stop_server(self):
+        self.server.send_signal(signal.SIGTERM)
+        self.assertEqual(self.server.wait(10), 0)
+
+    def test_clients_share_book(self):
+        first, second = RemoteClient(self.socket), RemoteClient(self.socket)
+        self.assertEqual(first.request(line="add_child Ann 1234567890"), {"output": "Contact added.\n", "error": None})
+        self.assertEqual(second.request(line="show Ann")["output"], "Contact name: Ann, phones: 1234567890\n")
+        self.assertEqual(second.request(complete="a")["names"], ["Ann"])
+        self.assertEqual(second.request(line="show Bob")["error"], "'Contact with name Bob not found'")
+        self.assertEqual(first.request(line="exit")["error"], "Command exit is not served")
+        first.sock.sendall(b"not json\n")
+        self.assertEqual(first.file.readline(), b'{"output": "", "error": "Broken request"}\n')
+        self.assertEqual(os.stat(self.socket).st_mode & 0o777, 0o600)
+        first.close()
+        second.close()
+        self.stop_server()
+        self.assertFalse(os.path.exists(self.socket))
+        self.assertIn("Ann", Journal(self.home / "santas-book.dmp").load().data)
+
+    def test_remote_shell(self):
+        shell = RemoteHelper()
+        shell.address = self.socket
+        with mock.patch("sys.stdout", new=io.StringIO()) as out, mock.patch("sys.stderr", new=io.StringIO()):
+            errors = shell.run_script(["add_child Ann 1234567890", "add_birthday Ann 1.1.2019", "show Bob", "show Ann"])
+        self.assertEqual(errors, [(3, "'Contact with name Bob not found'")])
+        self.assertIn("Contact name: Ann, phones: 1234567890, birthday: 01.01.2019", out.getvalue())
+        self.stop_server()
+
+    def test_split_address(self):
+        self.assertEqual(split_address("localhost:7000"), ("localhost", 7000))
+        self.assertEqual(split_address(":7000"), ("127.0.0.1", 7000))
+        self.assertIsNone(split_address("/tmp/elf.sock"))
+        self.assertIsNone(split_address("/tmp/a:1"))
+
+
+class TestTcpServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.home = Path(self.tmp.name)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.address = f"127.0.0.1:{sock.getsockname()[1]}"
+        env = dict(os.environ, HOME=str(self.home), ELF_STORAGE="journal")
+        self.server = subprocess.Popen([sys.executable, "-m", "santashelper.elf", "serve", self.address], env=env)
+        self.token = self.home / ".santas-book.token"
+        for _ in range(100):
+            if self.token.exists():
+                break
+            time.sleep(0.05)
+        self.home_patch = mock.patch.dict(os.environ, {"HOME": str(self.home)})
+        self.home_patch.start()
+
+    def tearDown(self):
+        self.home_patch.stop()
+        if self.server.poll() is None:
+            self.server.kill()
+            self.server.wait()
+        self.tmp.cleanup()
+
+    def connect(self) -> RemoteClient:
+        for _ in range(100):
+            try:
+                return RemoteClient(self.address)
+            except ConnectionRefusedError:
+                time.sleep(0.05)
+        raise AssertionError("server did not start")
+
+    def test_token_required(self):
+        client = self.connect()
+        self.assertEqual(os.stat(self.token).st_mode & 0o777, 0o600)
+        self.assertEqual(client.request(line="add_child Ann 1234567890")["error"], None)
+        client.close()
+
+        with socket.create_connection(split_address(self.address)) as sock:
+            sock.sendall(b'{"line": "export /tmp/children.csv"}\n')
+            self.assertEqual(sock.makefile("rb").read(), b'{"output": "", "error": "Not authorized"}\n')
+        with socket.create_connection(split_address(self.address)) as sock:
+            sock.sendall(b'{"token": "guess"}\n{"line": "show Ann"}\n')
+            self.assertEqual(sock.makefile("rb").read(), b'{"output": "", "error": "Not authorized"}\n')
+
+        self.token.write_text("stale")
+        with self.assertRaisesRegex(ConnectionRefusedError, "did not accept the token"):
+            RemoteClient(self.address)
+        self.server.send_signal(signal.SIGTERM)
+        self.assertEqual(self.server.wait(10), 0)
+        self.assertFalse(self.token.exists())
+
+
+class TestServeAddress(unittest.TestCase):
+    def test_refuses_public_host(self):
+        for address in ("0.0.0.0:7000", "192.168.1.5:7000", "[::]:7000", "example.com:7000"):
+            shell = mock.Mock()
+            with self.assertRaisesRegex(ValueError, "Refusing to serve"):
+                asyncio.run(serve(shell, address))
+            shell.open_address_book.assert_not_called()
+        with mock.patch("sys.stderr", new=io.StringIO()) as err:
+            self.assertEqual(elf.main(["serve", "0.0.0.0:7000"]), 2)
+        self.assertIn("Refusing to serve on 0.0.0.0", err.getvalue())
+
+    def test_ipv6_loopback(self):
+        self.assertEqual(split_address("[::1]:7000"), ("::1", 7000))
+
+
+if __name__ == "__main__":
+    unittest.main()
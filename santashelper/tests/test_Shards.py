@@ -0,0 +1,166 @@
+import io
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from santashelper.classes.Journal import Journal
+from santashelper.classes.Notes import Notes
+from santashelper.classes.Record import Record
+from santashelper.classes.SantasHelper import SantasHelper
+from santashelper.classes.Shards import ShardedStorage, shard_of
+
+
+class TestShardedStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "book.shards"
+        self.storage = ShardedStorage(self.path, count=4)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def inodes(self) -> dict:
+        return {path.name: path.stat().st_ino for path in self.path.iterdir()}
+
+    def test_round_trip_keeps_order(self):
+        book = self.storage.load()
+        names = [f"Child{i}" for i in range(20)]
+        for name in names:
+            book.add_record(Record(name))
+        book.find("Child3").add_phone("1234567890")
+        book.add_note("buy sleigh")
+        self.storage.save(book)
+        book.delete("Child7")
+        self.storage.save(book)
+        book.add_record(Record("Child7"))
+        self.storage.save(book)
+
+        loaded = ShardedStorage(self.path).load()
+        self.assertEqual(list(loaded.keys()), names[:7] + names[8:] + ["Child7"])
+        self.assertEqual(loaded.find("Child3").phones[0], "1234567890")
+        self.assertEqual(loaded.notes.search("sleigh"), "1 - buy sleigh\n")
+        self.assertEqual(loaded.find_by_phone("1234567890").name, "Child3")
+
+    def test_save_rewrites_dirty_shards_only(self):
+        book = self.storage.load()
+        for i in range(20):
+            book.add_record(Record(f"Child{i}"))
+        self.storage.save(book)
+        before = self.inodes()
+
+        book.find("Child5").add_address("North Pole")
+        self.storage.save(book)
+        after = self.inodes()
+        rewritten = sorted(name for name in after if after[name] != before[name])
+        self.assertEqual(rewritten, sorted([self.storage.shard_path(shard_of("Child5", 4)).name, "manifest.json"]))
+
+        book.add_note("milk")
+        self.storage.save(book)
+        rewritten = sorted(name for name, ino in self.inodes().items() if ino != after[name])
+        self.assertEqual(rewritten, ["manifest.json", "notes.dmp"])
+
+    def test_count_from_manifest(self):
+        book = self.storage.load()
+        book.add_record(Record("Ann"))
+        self.storage.save(book)
+        storage = ShardedStorage(self.path, count=16)
+        self.assertEqual(list(storage.load().keys()), ["Ann"])
+        self.assertEqual(storage.count, 4)
+
+    def test_moves_journal_book(self):
+        legacy = Path(self.tmp.name) / "book.dmp"
+        journal = Journal(legacy)
+        book = journal.load()
+        book.add_record(Record("Ann"))
+        book.add_note("from the journal")
+        journal.save(book)
+
+        loaded = ShardedStorage(self.path, count=4, legacy=legacy).load()
+        self.assertEqual(list(loaded.keys()), ["Ann"])
+        self.assertTrue((self.path / "manifest.json").exists())
+        self.assertEqual(list(ShardedStorage(self.path).load().notes.keys()), [1])
+
+    def test_sessions(self):
+        first = self.storage.load()
+        first.add_record(Record("Ann"))
+        first.add_note("from the first")
+        self.storage.save(first)
+        second_storage = ShardedStorage(self.path)
+        second = second_storage.load()
+
+        first.add_record(Record("Bob"))
+        first.add_note("milk")
+        first.find("Ann").add_phone("1234567890")
+        self.assertEqual(self.storage.save(first), [])
+        second.add_record(Record("Cid"))
+        second.add_note("cookies")
+        second.delete("Ann")
+        self.assertEqual(second_storage.save(second), ["Ann"])
+
+        loaded = ShardedStorage(self.path).load()
+        self.assertEqual(list(loaded.keys()), ["Ann", "Bob", "Cid"])
+        self.assertEqual(loaded.find("Ann").phones[0], "1234567890")
+        self.assertEqual(loaded.notes.list(), "1 - from the first\n2 - milk\n3 - cookies\n")
+        self.assertEqual(list(second.keys()), ["Ann", "Bob", "Cid"])
+        self.assertEqual(second_storage.generation, 4)
+        with open(self.path / "manifest.json", encoding="utf-8") as fh:
+            self.assertEqual(json.load(fh)["generation"], 4)
+
+    def test_conflicts(self):
+        first = self.storage.load()
+        first.add_record(Record("Ann"))
+        first.add_record(Record("Bob"))
+        first.add_note("from the first")
+        self.storage.save(first)
+        second_storage = ShardedStorage(self.path)
+        second = second_storage.load()
+
+        first.find("Ann").add_phone("1234567890")
+        first.delete("Bob")
+        first.notes.change_note("1", "changed by first")
+        self.storage.save(first)
+        self.storage.compact(first)
+        second.find("Ann").add_address("North Pole")
+        second.find("Bob").add_address("South Pole")
+        second.notes.change_note("1", "changed by second")
+        second.add_record(Record("Cid"))
+        self.assertEqual(sorted(second_storage.save(second)), ["Ann", "Bob", "note 1"])
+
+        loaded = ShardedStorage(self.path).load()
+        self.assertEqual(str(loaded), "Contact name: Ann, phones: 1234567890\nContact name: Cid")
+        self.assertEqual(loaded.notes.show("1"), "changed by first")
+        second.find("Ann").add_address("North Pole")
+        self.assertEqual(second_storage.save(second), [])
+        self.assertEqual(ShardedStorage(self.path).load().find("Ann").address.value, "North Pole")
+
+    def test_reads_format_1(self):
+        self.path.mkdir()
+        rec = Record("Ann")
+        (self.path / "children-000.dmp").write_bytes(pickle.dumps([(0, rec)]))
+        (self.path / "notes.dmp").write_bytes(pickle.dumps(Notes()))
+        (self.path / "manifest.json").write_text(json.dumps({"format": 1, "shards": 1}))
+        storage = ShardedStorage(self.path)
+        book = storage.load()
+        book.add_record(Record("Bob"))
+        storage.save(book)
+        self.assertEqual(list(ShardedStorage(self.path).load().keys()), ["Ann", "Bob"])
+
+    def test_shell(self):
+        with mock.patch.dict(os.environ, {"HOME": self.tmp.name}), mock.patch("sys.stdout", new=io.StringIO()):
+            shell = SantasHelper()
+            shell.storage_kind = "shards"
+            self.assertEqual(shell.run_script(["add_child Ann 1234567890", "add_note wrap gifts"]), [])
+            self.assertIsInstance(shell.storage, ShardedStorage)
+            shell = SantasHelper()
+            shell.storage_kind = "shards"
+            shell.open_address_book()
+        self.assertEqual(shell.book.find("Ann").phones[0], "1234567890")
+        self.assertTrue((Path(self.tmp.name) / "santas-book.shards" / "manifest.json").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import datetime as dt
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from santashelper.classes.Fields import IncorrectFormatException, Note, NotesNotFoundError
+from santashelper.classes.Notes import Notes
+from santashelper.classes.Record import Record
+from santashelper.classes.SqliteBook import SqliteBook, SqliteStorage
+from santashelper.classes.AddressBook import AddressBook
+
+
+class TestSqliteBook(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "book.sqlite"
+        self.book = SqliteBook(self.path)
+        record = Record("John Doe")
+        record.add_phone("1234567890")
+        record.add_email("John.Doe@example.com")
+        self.book.add_record(record)
+        self.book.add_record(Record("Jane Smith"))
+
+    def tearDown(self):
+        self.book.close()
+        self.tmp.cleanup()
+
+    def reopen(self):
+        self.book.close()
+        self.book = SqliteBook(self.path)
+
+    def test_persisted_after_commit(self):
+        self.book.find("John Doe").add_address("123 Main St")
+        self.reopen()
+        self.assertEqual(
+            str(self.book.find("John Doe")),
+            "Contact name: John Doe, phones: 1234567890, email: John.Doe@example.com, address: 123 Main St",
+        )
+        self.assertEqual(self.book.get_contact_names(), ["John Doe", "Jane Smith"])
+
+    def test_duplicate(self):
+        with self.assertRaises(KeyError):
+            self.book.add_record(Record("John Doe"))
+
+    def test_delete(self):
+        self.book.delete("Jane Smith")
+        self.reopen()
+        self.assertEqual(len(self.book), 1)
+        with self.assertRaises(KeyError):
+            self.book.delete("Jane Smith")
+
+    def test_compact(self):
+        for i in range(2000):
+            self.book.add_record(Record(f"Child{i}"))
+        self.book.commit()
+        for i in range(2000):
+            self.book.delete(f"Child{i}")
+        size = self.path.stat().st_size
+        self.assertEqual(SqliteStorage(self.path).compact(self.book), [])
+        self.assertLess(self.path.stat().st_size, size)
+        self.reopen()
+        self.assertEqual(self.book.get_contact_names(), ["John Doe", "Jane Smith"])
+
+    def test_iter_records(self):
+        self.assertEqual([str(rec.name) for rec in self.book.iter_records(1)], ["Jane Smith"])
+        self.assertEqual([str(rec.name) for rec in self.book.iter_records(0, 1)], ["John Doe"])
+
+    def test_sorted_pages_match_address_book(self):
+        memory = AddressBook()
+        for name, birthday, wishes in (("dan", "03.03.2015", 1), ("Ann", None, 0), ("cid", "01.01.2012", 3),
+                                       ("Bo", "03.03.2015", 2), ("eve", None, 2)):
+            for book in (memory, self.book):
+                rec = Record(name)
+                if birthday:
+                    rec.add_birthday(birthday)
+                rec.add_wishlist_items(["toy"] * wishes)
+                book.add_record(rec)
+        self.book.delete("John Doe")
+        self.book.delete("Jane Smith")
+        for sort in (None, "name", "birthday", "age", "wishlist"):
+            for desc in (False, True):
+                got = [str(rec.name) for rec in self.book.iter_records(1, 3, sort, desc)]
+                expected = [str(rec.name) for rec in memory.iter_records(1, 3, sort, desc)]
+                self.assertEqual(got, expected)
+
+    def test_suggest_names(self):
+        self.assertEqual(self.book.suggest_names("jon doe"), ["John Doe"])
+        with self.assertRaisesRegex(KeyError, "did you mean Jane Smith"):
+            self.book.delete("Jane Smit")
+
+    def test_complete_names(self):
+        self.assertEqual(self.book.complete_names("j"), ["Jane Smith", "John Doe"])
+        self.assertEqual(self.book.complete_names("JO", 1), ["John Doe"])
+        self.assertEqual(self.book.complete_names("%"), [])
+
+    def test_search(self):
+        self.assertEqual([str(rec.name) for rec in self.book.search("JOHN.DOE")], ["John Doe"])
+        with self.assertRaises(IncorrectFormatException):
+            self.book.search("XYZ")
+
+    def test_birthdays(self):
+        day = dt.date.today() + dt.timedelta(days=3)
+        self.book.find("Jane Smith").add_birthday(day.replace(year=day.year - 10).strftime("%d.%m.%Y"))
+        self.assertIn("Jane Smith", self.book.get_birthdays_per_days(7))
+        self.assertEqual(self.book.get_birthdays_per_days(1), "No upcoming birthdays for 1 days")
+
+    def test_weekend_birthdays_in_book_order(self):
+        self.book.find("John Doe").add_birthday("25.10.2015")
+        self.book.find("Jane Smith").add_birthday("24.10.2015")
+
+        class Today(dt.datetime):
+            @classmethod
+            def today(cls):
+                return cls(2026, 10, 22)
+
+        with mock.patch("santashelper.classes.AddressBook.dt.datetime", Today):
+            self.assertEqual(self.book.get_birthdays_per_days(7), "Monday    (26.10.2026): John Doe, Jane Smith")
+
+    def test_book_order_over_variable_limit(self):
+        self.book.conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 10)
+        names = [f"Child{i}" for i in range(30)]
+        for name in names:
+            record = Record(name)
+            record.add_birthday("26.10.2015")
+            self.book.add_record(record)
+
+        class Today(dt.datetime):
+            @classmethod
+            def today(cls):
+                return cls(2026, 10, 22)
+
+        with mock.patch("santashelper.classes.AddressBook.dt.datetime", Today):
+            report = self.book.get_birthdays_per_days(7)
+        self.assertEqual(report, "Monday    (26.10.2026): " + ", ".join(names))
+        self.assertEqual(self.book.in_book_order(reversed(names)), names)
+
+    def test_notes(self):
+        self.assertEqual(self.book.add_note("buy sleigh"), 1)
+        self.book.notes.add_tag("1", "todo")
+        self.reopen()
+        self.assertEqual(self.book.notes.show("1"), "buy sleigh\ntags: todo")
+        self.assertEqual(self.book.notes.get_taged({"todo"}), "1 - buy sleigh; tags: todo\n")
+        self.assertEqual(self.book.add_note("feed deer"), 2)
+        self.assertEqual(self.book.notes.get_taged(set(), excluded={"todo"}), "2 - feed deer\n")
+        self.assertEqual(self.book.notes.tag_counts(), {"todo": 1})
+
+    def test_note_search(self):
+        notes = Notes()
+        for text in ["Buy reindeer food for the long winter", "Reindeer Rudolph: red nose, reindeer hungry",
+                     "buy milk", "Wrap the presents for Rudolph"]:
+            self.book.add_note(text)
+            notes.add(Note(text))
+        for query in ["MILK buy", "REINDEER", "rein* food", "hung*", '"red nose"', "rudolph presents"]:
+            self.assertEqual(self.book.notes.search(query), notes.search(query))
+        with self.assertRaises(NotesNotFoundError):
+            self.book.notes.search('"nose red"')
+
+        self.book.notes.add_tag("4", "urgent")
+        self.book.notes.change_note("1", "Buy carrots")
+        self.book.notes.delete("3")
+        self.assertEqual(self.book.notes.search("urgent"), "4 - Wrap the presents for Rudolph; tags: urgent\n")
+        self.assertEqual(self.book.notes.search("buy"), "1 - Buy carrots\n")
+
+        self.book.conn.execute("DELETE FROM notes_fts")
+        self.reopen()
+        self.assertEqual(self.book.notes.search("carrots"), "1 - Buy carrots\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from santashelper.classes.AddressBook import AddressBook
+from santashelper.classes.SantasHelper import SantasHelper
+from santashelper.classes.Stats import CommandStats, Rolling
+
+
+class NullStorage:
+    def save(self, book):
+        pass
+
+
+class TestStats(unittest.TestCase):
+    def test_percentiles(self):
+        rolling = Rolling()
+        for value in range(1, 101):
+            rolling.add(value)
+        self.assertEqual(rolling.percentiles(50, 95, 99, 100), [50, 95, 99, 100])
+        self.assertEqual(Rolling().percentiles(50), [0.0])
+
+    def test_window(self):
+        rolling = Rolling(10)
+        for value in range(100):
+            rolling.add(value)
+        self.assertEqual(rolling.percentiles(50), [94])
+
+    def test_summary(self):
+        stats = CommandStats()
+        stats.record("search", 0.2)
+        stats.record("add_child", 0.1, 0.3)
+        summary = stats.summary()
+        self.assertEqual(list(summary), ["add_child", "search"])
+        self.assertEqual(summary["add_child"]["count"], 1)
+        self.assertAlmostEqual(summary["add_child"]["total"]["p99"], 0.4)
+        self.assertEqual(summary["add_child"]["save"]["p50"], 0.3)
+        self.assertIn("add_child", str(stats))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "stats.json"
+            stats.dump(path)
+            self.assertEqual(json.loads(path.read_text()), summary)
+
+    def test_shell_hooks(self):
+        shell = SantasHelper()
+        shell.stats = CommandStats()
+        shell.book = AddressBook()
+        shell.storage = NullStorage()
+        with redirect_stdout(io.StringIO()) as out:
+            for line in ("ADD_CHILD John 1234567890", "show John", "unknown", "", "profile show John"):
+                line = shell.precmd(line)
+                shell.postcmd(shell.onecmd(line), line)
+        self.assertEqual(sorted(shell.stats.counts), ["add_child", "profile", "show"])
+        self.assertIn("cumulative", out.getvalue())
+        self.assertIn("Contact name: John", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import importlib.resources
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from asciimatics.screen import Screen
+
+from santashelper.classes import animation
+
+
+class FakeScreen:
+    height = 20
+    width = 80
+    unicode_aware = True
+    colours = 256
+    palette = Screen._256_palette
+
+
+class TestFramesCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.tmp.name})
+        self.env.start()
+        self.image = importlib.resources.files(animation.__package__) / animation.IMG
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_replay_from_cache(self):
+        screen = FakeScreen()
+        first = animation.santa_renderer(screen, self.image)
+        path = animation.frames_path(screen, self.image)
+        self.assertTrue(path.exists())
+        self.assertEqual(Path(self.tmp.name) / "santashelper", path.parent)
+        with mock.patch.object(animation, "render_frames", side_effect=AssertionError):
+            second = animation.santa_renderer(screen, self.image)
+        self.assertEqual(second.rendered_text, first.rendered_text)
+
+    def test_keeps_current_size_only(self):
+        screen, other = FakeScreen(), FakeScreen()
+        other.height = 10
+        animation.santa_renderer(other, self.image)
+        animation.santa_renderer(screen, self.image)
+        files = list(animation.cache_dir().glob("frames-*"))
+        self.assertEqual(files, [animation.frames_path(screen, self.image)])
+
+    def test_key(self):
+        screen, other = FakeScreen(), FakeScreen()
+        other.unicode_aware = False
+        self.assertNotEqual(animation.frames_path(screen, self.image), animation.frames_path(other, self.image))
+        other.unicode_aware, other.height = True, 30
+        self.assertNotEqual(animation.frames_path(screen, self.image), animation.frames_path(other, self.image))
+
+    def test_broken_cache(self):
+        screen = FakeScreen()
+        path = animation.frames_path(screen, self.image)
+        path.parent.mkdir(parents=True)
+        path.write_text("[broken")
+        renderer = animation.santa_renderer(screen, self.image)
+        self.assertTrue(renderer.max_height > 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from santashelper import elf
+from santashelper.classes.AddressBook import AddressBook
+from santashelper.classes.Record import Record
+from santashelper.classes.SantasHelper import SantasHelper
+from santashelper.classes.animation import animation_wanted
+
+
+class CountingStorage:
+    def __init__(self):
+        self.saves = 0
+
+    def save(self, book):
+        self.saves += 1
+
+
+class BatchHelper(SantasHelper):
+    def open_address_book(self):
+        self.storage = CountingStorage()
+        self.book = AddressBook()
+
+
+class TestElf(unittest.TestCase):
+    def test_animation_wanted(self):
+        self.assertFalse(animation_wanted(no_animation=True))
+        with mock.patch.dict(os.environ, {"ELF_NO_ANIMATION": "1"}):
+            self.assertFalse(animation_wanted())
+        with mock.patch.dict(os.environ, {"ELF_NO_ANIMATION": ""}), mock.patch("sys.stdin.isatty", return_value=False):
+            self.assertFalse(animation_wanted())
+
+    def test_start_without_terminal(self):
+        code = "import sys, santashelper.elf; print('asciimatics' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(out.strip(), "False")
+        with tempfile.TemporaryDirectory() as home:
+            env = dict(os.environ, HOME=home, ELF_STORAGE="journal")
+            res = subprocess.run(
+                [sys.executable, "-m", "santashelper.elf"], input="exit\n", env=env, capture_output=True, text=True
+            )
+        self.assertEqual(res.returncode, 0)
+        self.assertIn("Goodbye!", res.stdout)
+
+
+class TestPages(unittest.TestCase):
+    def test_next_prev(self):
+        shell = BatchHelper()
+        shell.open_address_book()
+        for i in range(5):
+            shell.book.add_record(Record(f"Child{i}"))
+        with mock.patch("sys.stdout", new=io.StringIO()) as out:
+            shell.onecmd("next")
+            shell.onecmd("page_size 2")
+            for line in ("list_children", "next", "next", "next", "prev", "list_children --offset=1 --limit=3", "prev"):
+                shell.onecmd(line)
+        pages = [line for line in out.getvalue().splitlines() if line.startswith(("Children", "No more"))]
+        self.assertEqual(pages, [
+            "Children 1-2 of 5, type next for more",
+            "Children 3-4 of 5, type next for more",
+            "Children 5-5 of 5",
+            "No more children, there are 5 in the book.",
+            "Children 5-5 of 5",
+            "Children 2-4 of 5, type next for more",
+            "Children 1-3 of 5, type next for more",
+        ])
+        self.assertTrue(out.getvalue().startswith("Start with list_children please."))
+
+
+class TestBatchMode(unittest.TestCase):
+    SCRIPT = [
+        "add_child Ann 1234567890",
+        "",
+        "# comment",
+        "add_child Bob 12",
+        "bogus",
+        "add_email Ann ann@example.com",
+        "ADD_ADDRESS Ann Main St",
+        "add_child Cid 1234567891",
+        "add_birthday Cid 01.01.2019",
+        "list_children",
+    ]
+
+    def run_script(self, save_every: int):
+        shell = BatchHelper()
+        with mock.patch("sys.stdout", new=io.StringIO()) as out, mock.patch("sys.stderr", new=io.StringIO()) as err:
+            errors = shell.run_script(self.SCRIPT, save_every)
+        return shell, errors, out.getvalue(), err.getvalue()
+
+    def test_single_save(self):
+        shell, errors, out, err = self.run_script(0)
+        self.assertEqual(shell.storage.saves, 1)
+        self.assertEqual([number for number, _ in errors], [4, 5])
+        self.assertEqual(errors[1][1], "Unknown command bogus")
+        self.assertIn("line 4: add_child Bob 12:", err)
+        self.assertIn("Children 1-2 of 2", out)
+        self.assertEqual(str(shell.book.find("Ann").address), "Main St")
+
+    def test_save_every(self):
+        shell, errors, out, err = self.run_script(2)
+        self.assertEqual(shell.storage.saves, 4)
+
+    def test_exit_codes(self):
+        with tempfile.TemporaryDirectory() as home, mock.patch.dict(
+            os.environ, {"HOME": home, "ELF_STORAGE": "journal"}
+        ):
+            script = os.path.join(home, "script.txt")
+            with open(script, "w") as fh:
+                fh.write("add_child Ann 1234567890\nshow Ann\n")
+            with mock.patch("sys.stdout", new=io.StringIO()):
+                self.assertEqual(elf.main(["--script", script]), 0)
+                self.assertEqual(len(SantasHelper().run_script(["show Bob"])), 1)
+            with mock.patch("sys.stderr", new=io.StringIO()):
+                self.assertEqual(elf.main(["--script", os.path.join(home, "missing.txt")]), 2)
+            with open(script, "w") as fh:
+                fh.write("show Ann\nshow Bob\n")
+            with mock.patch("sys.stdout", new=io.StringIO()) as out, mock.patch("sys.stderr", new=io.StringIO()):
+                self.assertEqual(elf.main(["--script", script]), 1)
+            self.assertIn("Contact name: Ann", out.getvalue())
+
+    def test_failed_files_and_page_size(self):
+        home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home)
+        with mock.patch.dict(os.environ, {"HOME": home, "ELF_STORAGE": "journal"}):
+            script = os.path.join(home, "script.txt")
+            with open(script, "w") as fh:
+                fh.write(f"import {home}/missing.csv\nexport {home}/nonexistent/x.csv\npage_size 0\nnext\n")
+            with mock.patch("sys.stdout", new=io.StringIO()), mock.patch("sys.stderr", new=io.StringIO()) as err:
+                self.assertEqual(elf.main(["--script", script]), 1)
+        lines = err.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn("line 1:", lines[0])
+        self.assertIn("Can't read", lines[0])
+        self.assertIn("Can't write", lines[1])
+        self.assertIn("line 3: page_size 0: Page size must be a positive number", lines[2])
+        self.assertIn("line 4: next: Start with list_children please.", lines[3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,7 +9,8 @@ setup(
     author_email='kkondor@yahoo.com',
     license='MIT',
     packages=find_namespace_packages(),
-    install_requires=['asciimatics'],
+    install_requires=['asciimatics', 'Pillow'],
+    extras_require={'fast': ['numpy']},
     include_package_data=True,
     entry_points={'console_scripts': ['elf = santashelper.elf:main']}
 ) 